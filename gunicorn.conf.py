@@ -0,0 +1,32 @@
+# gunicorn.conf.py
+# Usage: gunicorn -c gunicorn.conf.py hirelens.wsgi
+#
+# Preload mode: the master imports Django, loads and freezes the embedding
+# model once, then forks. Workers share the weight pages copy-on-write
+# instead of each holding its own copy.
+# Verify with: python manage.py worker_memory <master pid>
+import multiprocessing
+import os
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hirelens.settings")
+os.environ.setdefault("HIRELENS_PRELOAD_MODEL", "1")
+# HF tokenizers' Rust thread pool must not be started before fork
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+preload_app = True
+
+
+def post_fork(server, worker):
+    from django.conf import settings
+    from hirelens_app.services.embedding import after_fork
+
+    after_fork(settings.EMBEDDING_TORCH_THREADS)
+
+
+def post_worker_init(worker):
+    from hirelens_app.services.memory_stats import read_memory
+
+    worker.log.info("worker %s memory (kB): %s", worker.pid, read_memory())
@@ -0,0 +1,40 @@
+# gunicorn_asgi.conf.py
+# Usage: gunicorn -c gunicorn_asgi.conf.py hirelens.asgi:application
+# (or, without gunicorn: uvicorn hirelens.asgi:application --workers 2)
+#
+# ASGI deployment with uvicorn workers. The interview chat endpoints are
+# async there (hirelens/asgi.py turns HIRELENS_ASYNC_CHAT on), so each
+# worker's event loop holds hundreds of concurrent interviews that are
+# waiting on the LLM. Workers are therefore few (one per core), and each
+# keeps a larger OpenAI connection pool. Model preloading works as in
+# gunicorn.conf.py.
+import multiprocessing
+import os
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hirelens.settings")
+os.environ.setdefault("HIRELENS_ASYNC_CHAT", "1")
+os.environ.setdefault("HIRELENS_PRELOAD_MODEL", "1")
+os.environ.setdefault("OPENAI_MAX_CONNECTIONS", "200")
+# HF tokenizers' Rust thread pool must not be started before fork
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count()))
+worker_class = "uvicorn_worker.UvicornWorker"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+# Connections a worker accepts at once (uvicorn's limit_concurrency)
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "1000"))
+preload_app = True
+
+
+def post_fork(server, worker):
+    from django.conf import settings
+    from hirelens_app.services.embedding import after_fork
+
+    after_fork(settings.EMBEDDING_TORCH_THREADS)
+
+
+def post_worker_init(worker):
+    from hirelens_app.services.memory_stats import read_memory
+
+    worker.log.info("worker %s memory (kB): %s", worker.pid, read_memory())
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hirelens.settings')
+# Serve the interview chat with its native async views (see settings.ASYNC_CHAT)
+os.environ.setdefault('HIRELENS_ASYNC_CHAT', '1')
 
 application = get_asgi_application()
@@ -38,6 +38,12 @@ from dotenv import load_dotenv
 load_dotenv() # Loads the .env file
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# Optional OpenAI-compatible endpoint (proxy, gateway or a local fake in tests)
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+# Pooled connections per OpenAI client; raise it when one async process
+# serves many concurrent interviews (gunicorn_asgi.conf.py does)
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "50"))
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -87,6 +93,8 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Web and run_workers processes write concurrently; wait for locks
+        'OPTIONS': {'timeout': 20},
     }
 }
 
@@ -129,6 +137,55 @@ STATIC_URL = 'static/'
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# "llm" caches OpenAI responses (services/llm_cache.py). The file backend is
+# shared by web and run_workers processes; swap in Redis/Memcached if needed.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "llm": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / "llm_cache",
+        "TIMEOUT": 7 * 24 * 3600,
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    },
+    # Hot state of live interviews (services/session_state.py); file based so
+    # all workers share it, locmem is enough for a single process
+    "sessions": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / "session_cache",
+        "TIMEOUT": 2 * 3600,
+        "OPTIONS": {"MAX_ENTRIES": 2000},
+    },
+}
+
+# Embedding cache: in-process LRU + on-disk SQLite tier shared by all workers.
+# Set EMBEDDING_CACHE_PATH to None to keep the cache in memory only.
+EMBEDDING_CACHE_PATH = BASE_DIR / "embedding_cache.sqlite3"
+EMBEDDING_CACHE_MEMORY_ITEMS = 10000
+
+# Embedding inference backend: "torch" (fp32 reference), "onnx" or
+# "onnx-int8". The ONNX graphs come from `manage.py export_embedding_onnx`.
+EMBEDDING_BACKEND = os.getenv("HIRELENS_EMBEDDING_BACKEND", "torch")
+EMBEDDING_ONNX_DIR = BASE_DIR / "models" / "minilm"
+
+# Job-side vector index of candidate resume embeddings (float16, append-only)
+CANDIDATE_INDEX_DIR = BASE_DIR / "index" / "candidates"
+CANDIDATE_INDEX_DIM = 384  # all-MiniLM-L6-v2 hidden size
+
+# Preload mode: load the embedding model in the gunicorn master before fork.
+# gunicorn.conf.py turns this on; manage.py commands leave it off.
+EMBEDDING_PRELOAD = os.getenv("HIRELENS_PRELOAD_MODEL") == "1"
+EMBEDDING_TORCH_THREADS = int(os.getenv("HIRELENS_TORCH_THREADS", "1"))
+
+# Native async interview chat endpoints (async ORM + AsyncOpenAI). Set by
+# hirelens/asgi.py; under WSGI the sync views are routed instead.
+ASYNC_CHAT = os.getenv("HIRELENS_ASYNC_CHAT") == "1"
+
+# Prepare each analysed candidate's interview session (context + opening
+# question) in the background, so starting an interview is a DB lookup
+INTERVIEW_PREWARM = os.getenv("HIRELENS_INTERVIEW_PREWARM", "1") == "1"
+
 
 
 # Default primary key field type
@@ -73,11 +73,13 @@ class InterviewResultAdmin(admin.ModelAdmin):
     list_filter = ("is_correct", "ai_score")
     
     def get_candidate(self, obj):
-        return obj.question.analysis.candidate.name
+        # Transcript-graded results hang off the chat session instead of a question
+        analysis = obj.question.analysis if obj.question else obj.session.analysis
+        return analysis.candidate.name
     get_candidate.short_description = "Candidate"
     
     def get_question_topic(self, obj):
-        return obj.question.topic
+        return obj.question.topic if obj.question else "Chat Interview"
     get_question_topic.short_description = "Topic"
 
 # -----------------------------
@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 class HirelensAppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
@@ -6,3 +7,9 @@ class HirelensAppConfig(AppConfig):
 
     def ready(self):
         import hirelens_app.signals
+
+        # Preload mode (see gunicorn.conf.py): load the embedding model once
+        # in the master so forked workers share it copy-on-write
+        if settings.EMBEDDING_PRELOAD:
+            from .services.embedding import preload
+            preload()
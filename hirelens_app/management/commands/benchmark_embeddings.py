@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from hirelens_app.services.embedding import MODEL_NAME
+from hirelens_app.services.embedding_backends import BACKENDS, TORCH, load_backend
+from hirelens_app.services.embedding_eval import accuracy_report, throughput
+
+
+class Command(BaseCommand):
+    help = (
+        "Check each embedding backend's cosine scores against the fp32 torch "
+        "reference on a fixed corpus, and measure its throughput."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+        parser.add_argument("--batch-size", type=int, default=32)
+
+    def handle(self, *args, **options):
+        reference = load_backend(TORCH, MODEL_NAME, settings.EMBEDDING_ONNX_DIR)
+
+        for name in options["backends"]:
+            try:
+                backend = reference if name == TORCH else load_backend(
+                    name, MODEL_NAME, settings.EMBEDDING_ONNX_DIR
+                )
+            except (FileNotFoundError, ImportError) as e:
+                raise CommandError(str(e))
+
+            acc = accuracy_report(backend, reference)
+            speed = throughput(backend, batch_size=options["batch_size"])
+            self.stdout.write(
+                f"{name:<10} max|Δcos| {acc['max_abs_diff']:.5f}  "
+                f"mean|Δcos| {acc['mean_abs_diff']:.5f}  "
+                f"top-1 agree {acc['top1_agreement']:.0%}  "
+                f"{speed['sentences_per_sec']:>8.1f} sent/s  "
+                f"{speed['ms_per_batch']:>7.2f} ms/batch"
+            )
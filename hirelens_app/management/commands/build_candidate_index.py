@@ -0,0 +1,35 @@
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from hirelens_app.models import Candidate
+from hirelens_app.services.candidate_index import document_embedding, get_index
+from hirelens_app.services.resume_cache import get_resume_text
+
+
+class Command(BaseCommand):
+    help = "Embed resumes of candidates missing from the job-side vector index and append them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=64)
+
+    def handle(self, *args, **options):
+        index = get_index()
+        indexed = index.indexed_ids()
+        pending = Candidate.objects.exclude(id__in=indexed).exclude(resume="").only("id", "resume")
+
+        ids, vectors, added = [], [], 0
+        for candidate in pending.iterator():
+            text = get_resume_text(candidate.resume.path)
+            if not text.strip():
+                continue
+            ids.append(candidate.id)
+            vectors.append(document_embedding(text))
+
+            if len(ids) >= options["batch_size"]:
+                added += index.add(ids, np.vstack(vectors))
+                ids, vectors = [], []
+
+        if ids:
+            added += index.add(ids, np.vstack(vectors))
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed {added} candidates ({len(index)} total)"))
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from hirelens_app.services.embedding import MODEL_NAME
+from hirelens_app.services.embedding_backends import export_onnx
+
+
+class Command(BaseCommand):
+    help = "Export the embedding model to ONNX (fp32 and dynamic int8) for the onnx backends."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output-dir", default=str(settings.EMBEDDING_ONNX_DIR))
+
+    def handle(self, *args, **options):
+        fp32_path, int8_path = export_onnx(MODEL_NAME, options["output_dir"])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {fp32_path}"))
+        self.stdout.write(self.style.SUCCESS(f"Wrote {int8_path}"))
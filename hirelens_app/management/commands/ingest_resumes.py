@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from hirelens_app.models import CompanyRequirement
+from hirelens_app.services.bulk_ingest import (
+    DEFAULT_BATCH_SIZE, DEFAULT_WORKERS, collect_pdfs, ingest_resumes,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-ingest every PDF under a directory for one job: extraction, LLM "
+        "parsing and matching over a worker pool, committed in batches. "
+        "Safe to re-run after an interruption; finished files are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("directory")
+        parser.add_argument("--job", type=int, required=True, help="CompanyRequirement id")
+        parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            job = CompanyRequirement.objects.get(id=options["job"])
+        except CompanyRequirement.DoesNotExist:
+            raise CommandError(f"Job {options['job']} does not exist")
+
+        paths = collect_pdfs(options["directory"])
+        if not paths:
+            raise CommandError(f"No PDF files found under {options['directory']}")
+
+        self.stdout.write(f"Ingesting {len(paths)} resumes for '{job.job_title}'...")
+
+        def report(stats):
+            processed = stats.done + stats.skipped + stats.failed
+            self.stdout.write(
+                f"\r  {processed}/{stats.total}  done {stats.done}  skipped {stats.skipped}  "
+                f"failed {stats.failed}  {stats.rate * 60:.1f} resumes/min",
+                ending=""
+            )
+            self.stdout.flush()
+
+        stats = ingest_resumes(
+            paths, job,
+            workers=options["workers"],
+            batch_size=options["batch_size"],
+            progress=report
+        )
+        self.stdout.write("")
+        self.stdout.write(self.style.SUCCESS(
+            f"Finished in {stats.elapsed:.1f}s: {stats.done} ingested, "
+            f"{stats.skipped} already done, {stats.failed} failed"
+        ))
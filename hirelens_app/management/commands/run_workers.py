@@ -0,0 +1,53 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from hirelens_app.services.llm_engine import cache_stats
+from hirelens_app.services.task_queue import default_worker_id, work
+
+
+class Command(BaseCommand):
+    help = (
+        "Run background task workers (resume analysis pipeline) against the "
+        "database-backed queue. Stops cleanly on SIGINT/SIGTERM after the "
+        "current task of each worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=2, help="Worker threads in this process")
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds to sleep when the queue is empty")
+        parser.add_argument("--burst", action="store_true", help="Exit once the queue is drained")
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+
+        def shutdown(signum, frame):
+            self.stdout.write("Stopping workers after their current task...")
+            stop.set()
+
+        signal.signal(signal.SIGINT, shutdown)
+        signal.signal(signal.SIGTERM, shutdown)
+
+        counts = []
+
+        def run():
+            counts.append(work(
+                worker_id=default_worker_id(),
+                stop=stop,
+                poll_interval=options["poll_interval"],
+                burst=options["burst"]
+            ))
+
+        threads = [threading.Thread(target=run, daemon=True) for _ in range(options["workers"])]
+        for t in threads:
+            t.start()
+        self.stdout.write(f"{len(threads)} worker(s) started.")
+
+        # join() with a timeout keeps the main thread responsive to signals
+        while any(t.is_alive() for t in threads):
+            for t in threads:
+                t.join(timeout=0.5)
+
+        self.stdout.write(self.style.SUCCESS(f"Workers stopped; {sum(counts)} task(s) processed."))
+        self.stdout.write(f"LLM response cache: {cache_stats()}")
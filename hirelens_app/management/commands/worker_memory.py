@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from hirelens_app.services.memory_stats import worker_memory_report
+
+
+class Command(BaseCommand):
+    help = "Report RSS/PSS for a gunicorn master and each of its workers (Linux only)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("master_pid", type=int)
+
+    def handle(self, *args, **options):
+        rows = worker_memory_report(options["master_pid"])
+        if not rows[0].get("Rss"):
+            raise CommandError(f"Cannot read memory for pid {options['master_pid']}")
+
+        self.stdout.write(f"{'PID':>8} {'ROLE':<7} {'RSS MB':>9} {'PSS MB':>9} {'SHARED MB':>10}")
+        for row in rows:
+            shared = row.get("Shared_Clean", 0) + row.get("Shared_Dirty", 0)
+            self.stdout.write(
+                f"{row['pid']:>8} {row['role']:<7} "
+                f"{row.get('Rss', 0) / 1024:>9.1f} {row.get('Pss', 0) / 1024:>9.1f} {shared / 1024:>10.1f}"
+            )
+
+        total_rss = sum(r.get("Rss", 0) for r in rows) / 1024
+        total_pss = sum(r.get("Pss", 0) for r in rows) / 1024
+        self.stdout.write(f"Total RSS {total_rss:.1f} MB, total PSS {total_pss:.1f} MB (real footprint)")
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hirelens_app', '0006_interviewsession_chatmessage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumeParseCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('extracted_text', models.TextField(blank=True, default='')),
+                ('parsed_json', models.TextField(blank=True, default='', help_text='Structured LLM parse (JSON); empty until parsed')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hirelens_app', '0009_resumeanalysis_status_backgroundtask'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='resumeanalysis',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('parsing', 'Parsing resume'), ('questions', 'Generating questions and courses'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='done', max_length=20),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hirelens_app', '0010_alter_resumeanalysis_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='interviewsession',
+            name='summarized_through',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='interviewsession',
+            name='summary',
+            field=models.TextField(blank=True),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hirelens_app', '0011_interviewsession_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InterviewChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('text', models.TextField()),
+                ('embedding', models.BinaryField()),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='hirelens_app.interviewsession')),
+            ],
+            options={
+                'ordering': ['position'],
+            },
+        ),
+    ]
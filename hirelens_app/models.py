@@ -39,18 +39,52 @@ class Candidate(models.Model):
     email = models.EmailField()
     phone = models.CharField(max_length=20)
     resume = models.FileField(upload_to="resumes/")
+    # SHA-256 of the resume bytes; lets bulk ingestion skip files it already processed
+    resume_sha256 = models.CharField(max_length=64, blank=True, default="", db_index=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return self.name
 
 
+# =================================================
+# RESUME PARSE CACHE (content-addressed)
+# =================================================
+class ResumeParseCache(models.Model):
+    """
+    Extracted text and structured LLM parse of a resume file, keyed by the
+    SHA-256 of its bytes. The same PDF uploaded again (or analysed against
+    another job) is never re-extracted or re-parsed.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    extracted_text = models.TextField(blank=True, default="")
+    parsed_json = models.TextField(blank=True, default="", help_text="Structured LLM parse (JSON); empty until parsed")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Resume {self.sha256[:12]}"
+
+
 # =================================================
 # RESUME ANALYSIS (Updated for AI)
 # =================================================
 # hirelens_app/models.py
 
 class ResumeAnalysis(models.Model):
+    # Pipeline progress; analyses created outside the task queue are DONE
+    STATUS_QUEUED = "queued"
+    STATUS_PARSING = "parsing"
+    STATUS_QUESTIONS = "questions"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_PARSING, "Parsing resume"),
+        (STATUS_QUESTIONS, "Generating questions and courses"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
     candidate = models.ForeignKey(Candidate, on_delete=models.CASCADE)
     job = models.ForeignKey(CompanyRequirement, on_delete=models.CASCADE)
     similarity_score = models.FloatField(default=0.0)
@@ -59,8 +93,14 @@ class ResumeAnalysis(models.Model):
     # 🔥 NEW FIELD: Store the exact list of skills the AI found
     extracted_skills_list = models.TextField(blank=True, default="", help_text="Comma-separated list of extracted skills")
     
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_DONE, db_index=True)
+    
     analysis_time = models.DateTimeField(auto_now_add=True)
 
+    @property
+    def is_ready(self):
+        return self.status == self.STATUS_DONE
+
     def __str__(self):
         return f"{self.candidate.name} → {self.job.job_title}"
 # =================================================
@@ -89,6 +129,10 @@ class InterviewResult(models.Model):
     question = models.ForeignKey(GeneratedQuestion, on_delete=models.CASCADE,null=True, blank=True)
     candidate_answer = models.TextField(blank=True, default="")
 
+    # Answers graded from a chat interview transcript have no GeneratedQuestion
+    session = models.ForeignKey("InterviewSession", on_delete=models.CASCADE, null=True, blank=True, related_name="results")
+    question_text = models.TextField(blank=True, default="")
+
     
     # AI Grading Fields
     ai_score = models.IntegerField(default=0)  # 0 to 100
@@ -98,7 +142,8 @@ class InterviewResult(models.Model):
     submitted_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"Answer to {self.question.id} (Score: {self.ai_score})"
+        target = self.question_id or f"session {self.session_id}"
+        return f"Answer to {target} (Score: {self.ai_score})"
 
 
 # =================================================
@@ -117,13 +162,36 @@ class InterviewSession(models.Model):
     analysis = models.ForeignKey(ResumeAnalysis, on_delete=models.CASCADE)
     start_time = models.DateTimeField(auto_now_add=True)
     is_completed = models.BooleanField(default=False)
+    # False while a pre-warmed session waits to be claimed (services/interview_prewarm.py)
+    is_started = models.BooleanField(default=True)
+    # False until a pre-warmed session has its context and opening question;
+    # only ready sessions can be claimed
+    is_ready = models.BooleanField(default=True)
     
     # RAG Context: We store the 'System Prompt' here to ensure consistency
     system_context = models.TextField(blank=True)
 
+    # Rolling memory: older turns folded into a summary (see services/chat_memory.py)
+    summary = models.TextField(blank=True)
+    summarized_through = models.PositiveIntegerField(default=0)  # id of the last ChatMessage folded in
+
     def __str__(self):
         return f"Session: {self.analysis.candidate.name}"
 
+# Resume chunks of a session, embedded once at its start; each chat turn
+# retrieves only the relevant ones (services/resume_chunks.py)
+class InterviewChunk(models.Model):
+    session = models.ForeignKey(InterviewSession, on_delete=models.CASCADE, related_name="chunks")
+    position = models.PositiveIntegerField()
+    text = models.TextField()
+    embedding = models.BinaryField()  # float16, L2-normalized
+
+    class Meta:
+        ordering = ["position"]
+
+    def __str__(self):
+        return f"Chunk {self.position} of session {self.session_id}"
+
 # 2. New Model: Chat Message (Stores transcript)
 class ChatMessage(models.Model):
     session = models.ForeignKey(InterviewSession, on_delete=models.CASCADE)
@@ -132,4 +200,53 @@ class ChatMessage(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"{self.sender}: {self.message_text[:30]}..."
\ No newline at end of file
+        return f"{self.sender}: {self.message_text[:30]}..."
+
+
+# =================================================
+# BACKGROUND TASK QUEUE (database-backed, no broker)
+# =================================================
+class BackgroundTask(models.Model):
+    """
+    A unit of background work claimed and run by `manage.py run_workers`.
+
+    Handlers are split into stages; `stage` is the next one to run, so a
+    retry resumes at the stage that failed instead of starting over.
+    """
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    kind = models.CharField(max_length=50)
+    payload = models.TextField(default="{}", help_text="Handler arguments (JSON)")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    stage = models.PositiveSmallIntegerField(default=0)
+    attempts = models.PositiveSmallIntegerField(default=0, help_text="Failed attempts of the current stage")
+    last_error = models.TextField(blank=True, default="")
+    run_after = models.DateTimeField(db_index=True)
+    locked_by = models.CharField(max_length=100, blank=True, default="")
+    locked_at = models.DateTimeField(null=True, blank=True)
+    # Set by enqueue_once: at most one queued or running task per key
+    dedupe_key = models.CharField(max_length=64, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "run_after"])]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dedupe_key"],
+                condition=models.Q(status__in=["queued", "running"]),
+                name="unique_pending_task",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.id} ({self.status})"
@@ -2,13 +2,46 @@
 # mark as package; keep lightweight to avoid import-time heavy deps
 
 __all__ = [
+    "analysis_pipeline",
+    "bulk_ingest",
+    "candidate_index",
+    "chat_memory",
     "embedding",
+    "embedding_backends",
+    "embedding_cache",
+    "embedding_eval",
     "resume_parser",
+    "resume_cache",
     "requirements_engine",
+    "resume_chunks",
+    "session_state",
     "similarity_engine",
+    "single_flight",
     "skill_engine",
+    "skill_scoring",
+    "task_queue",
     "evaluation_engine",
     "course_engine",
     "improvement_plan",
     "interview_engine",
+    "interview_grading",
+    "interview_prewarm",
+    "job_matcher",
+    "llm_cache",
+    "memory_stats",
+    "openai_client",
+    "prompt_budget",
 ]
+
+
+def warmup():
+    """
+    Loads the embedding model and the shared OpenAI client up front.
+
+    Nothing heavy is imported until this (or the first real request) runs,
+    so management commands and the test suite never pay for torch.
+    """
+    from . import embedding, openai_client
+
+    embedding.warmup()
+    openai_client.get_client()
@@ -0,0 +1,137 @@
+# Background stages of the single-resume analysis (task kind "analyze_resume").
+# The view only creates a queued ResumeAnalysis and its task; `run_workers`
+# runs these stages in order. Each stage is idempotent, so retries are safe.
+# Within a stage, independent work is overlapped on one event loop: the
+# resume is embedded while the LLM parses it, and courses are picked while
+# the LLM writes the interview questions.
+import asyncio
+
+from django.db import transaction
+
+from . import openai_client
+from .course_recommender import recommend_courses_smart
+from .interview_engine import agenerate_ai_questions
+from .interview_prewarm import schedule_prewarm
+from .job_matcher import skill_coverage, split_skills
+from .resume_cache import cached_parse, get_resume_entry, store_parse
+from .resume_parser import aparse_resume_text, parse_failed
+
+
+def _load(analysis_id, status):
+    from hirelens_app.models import ResumeAnalysis
+
+    analysis = ResumeAnalysis.objects.select_related("candidate", "job").get(id=analysis_id)
+    if analysis.status != status:
+        analysis.status = status
+        analysis.save(update_fields=["status"])
+    return analysis
+
+
+def _skills(analysis):
+    return [s.strip() for s in analysis.extracted_skills_list.split(",") if s.strip()]
+
+
+def _index_candidate(candidate, resume_text):
+    # Job-side vector index (best effort; embedded once per candidate)
+    try:
+        from .candidate_index import index_candidate
+        index_candidate(candidate, resume_text)
+    except Exception as e:
+        print(f"Candidate Index Error: {e}")
+
+
+async def _parse_and_index(candidate, resume_text, parsed_data):
+    """LLM parse (unless cached) while the resume is embedded in a thread."""
+    indexing = asyncio.create_task(asyncio.to_thread(_index_candidate, candidate, resume_text))
+    if parsed_data is None:
+        parsed_data = await aparse_resume_text(resume_text)
+    await indexing
+    return parsed_data
+
+
+def parse_and_match(analysis_id):
+    """PDF extraction + LLM parse (cached by file hash), then skill scoring."""
+    from hirelens_app.models import ResumeAnalysis
+
+    analysis = _load(analysis_id, ResumeAnalysis.STATUS_PARSING)
+    entry = get_resume_entry(analysis.candidate.resume.path)
+    if not entry.extracted_text.strip():
+        raise ValueError("no text could be extracted from the resume")
+
+    parsed_data = openai_client.run(_parse_and_index(analysis.candidate, entry.extracted_text, cached_parse(entry)))
+    if parse_failed(parsed_data):
+        # Raising lets run_task retry the stage with backoff
+        raise ValueError("LLM resume parse failed")
+    store_parse(entry, parsed_data)
+
+    # Score is persisted now, so the status endpoint has it before questions exist
+    extracted_skills = [s.strip() for s in parsed_data.get("skills", []) if s.strip()]
+    scores, _, _ = skill_coverage([split_skills(analysis.job.required_skills)], extracted_skills)
+
+    analysis.similarity_score = round(float(scores[0]), 1)
+    analysis.ai_summary = parsed_data.get("summary", "Analysis pending...")
+    analysis.extracted_skills_list = ",".join(extracted_skills)
+    analysis.save(update_fields=["similarity_score", "ai_summary", "extracted_skills_list"])
+
+
+async def _questions_and_courses(skills, job_title, experience, missing_skills):
+    return await asyncio.gather(
+        agenerate_ai_questions(skills, job_title, experience),
+        asyncio.to_thread(recommend_courses_smart, sorted(missing_skills))
+    )
+
+
+def questions_and_courses(analysis_id):
+    """Interview questions (LLM) and course recommendations, concurrently."""
+    from hirelens_app.models import CourseRecommendation, GeneratedQuestion, ResumeAnalysis
+
+    analysis = _load(analysis_id, ResumeAnalysis.STATUS_QUESTIONS)
+    parsed_data = cached_parse(get_resume_entry(analysis.candidate.resume.path)) or {}
+    skills = _skills(analysis)
+    _, _, missing = skill_coverage([split_skills(analysis.job.required_skills)], skills)
+
+    questions, courses = openai_client.run(_questions_and_courses(
+        skills, analysis.job.job_title, parsed_data.get("experience_years", 0), missing[0]
+    ))
+
+    with transaction.atomic():
+        CourseRecommendation.objects.filter(analysis=analysis).delete()
+        CourseRecommendation.objects.bulk_create([
+            CourseRecommendation(
+                analysis=analysis,
+                skill_name=r["skill"],
+                course_name=r["course"],
+                course_link=r["link"]
+            )
+            for r in courses
+        ])
+
+    # Courses stay saved; a retry of this stage only matters for the questions
+    if not questions:
+        raise ValueError("LLM returned no interview questions")
+
+    with transaction.atomic():
+        GeneratedQuestion.objects.filter(analysis=analysis).delete()
+        GeneratedQuestion.objects.bulk_create([
+            GeneratedQuestion(
+                analysis=analysis,
+                question_text=q.get("text", "Default Question"),
+                difficulty=q.get("difficulty", "Medium"),
+                topic=q.get("topic", "General")
+            )
+            for q in questions
+        ])
+        analysis.status = ResumeAnalysis.STATUS_DONE
+        analysis.save(update_fields=["status"])
+
+        # Optional final step, run as its own task so that a failure there
+        # never fails the analysis: prepare the interview session ahead of time
+        schedule_prewarm(analysis.id)
+
+STAGES = [parse_and_match, questions_and_courses]
+
+
+def on_failure(error, analysis_id):
+    from hirelens_app.models import ResumeAnalysis
+
+    ResumeAnalysis.objects.filter(id=analysis_id).update(status=ResumeAnalysis.STATUS_FAILED)
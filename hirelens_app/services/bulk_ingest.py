@@ -0,0 +1,321 @@
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files import File
+from django.db import connection, transaction
+
+from .course_recommender import recommend_courses_smart
+from .job_matcher import skill_coverage, split_skills
+from .resume_cache import file_sha256, get_parsed_resume
+from .resume_parser import parse_failed
+
+DEFAULT_WORKERS = 4
+DEFAULT_BATCH_SIZE = 20
+MAX_ZIP_BYTES = 500 * 1024 * 1024  # uncompressed; guards against zip bombs
+
+# Uploads of the web form are staged under MEDIA_ROOT (shared with the
+# run_workers processes) and ingested by the "bulk_ingest" task; its
+# progress is kept in the "sessions" cache so the page can poll it.
+STAGING_SUBDIR = "bulk_ingest"
+PROGRESS_ALIAS = "sessions"
+PROGRESS_TIMEOUT = 24 * 3600
+
+
+class IngestStats:
+    """Progress counters for one ingestion run."""
+
+    def __init__(self, total):
+        self.total = total
+        self.done = 0
+        self.skipped = 0
+        self.failed = 0
+        self.started = time.monotonic()
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def rate(self):
+        return self.done / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self):
+        return {
+            "total": self.total,
+            "done": self.done,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "elapsed_s": round(self.elapsed, 1),
+            "resumes_per_min": round(self.rate * 60, 1),
+        }
+
+
+def collect_pdfs(directory):
+    return sorted(str(p) for p in Path(directory).rglob("*") if p.suffix.lower() == ".pdf")
+
+
+def extract_zip(zip_file, target_dir):
+    """Extracts the PDFs of a zip archive (directories flattened, names sanitized)."""
+    paths = []
+    with zipfile.ZipFile(zip_file) as archive:
+        members = [m for m in archive.infolist() if not m.is_dir() and m.filename.lower().endswith(".pdf")]
+        if sum(m.file_size for m in members) > MAX_ZIP_BYTES:
+            raise ValueError("Zip archive is too large to ingest")
+        for i, member in enumerate(members):
+            # One folder per member keeps the original file name unique
+            target = Path(target_dir) / f"{i:05d}" / os.path.basename(member.filename)
+            target.parent.mkdir()
+            with archive.open(member) as src, open(target, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            paths.append(str(target))
+    return paths
+
+
+def stage_uploads(uploaded_files, root=None):
+    """
+    Writes uploaded PDFs and zip archives to a new directory (in root, or
+    the system temp dir) so the pipeline can work on paths. Returns
+    (staging_dir, pdf_paths); the caller removes staging_dir when done.
+    """
+    if root:
+        os.makedirs(root, exist_ok=True)
+    staging_dir = tempfile.mkdtemp(prefix="hirelens_ingest_", dir=root)
+    paths = []
+    for n, upload in enumerate(uploaded_files):
+        name = os.path.basename(upload.name)
+        if name.lower().endswith(".zip"):
+            zip_dir = Path(staging_dir) / f"zip{n}"
+            zip_dir.mkdir()
+            paths.extend(extract_zip(upload, zip_dir))
+        elif name.lower().endswith(".pdf"):
+            target = Path(staging_dir) / f"{n:05d}" / name
+            target.parent.mkdir()
+            with open(target, "wb") as dst:
+                for chunk in upload.chunks():
+                    dst.write(chunk)
+            paths.append(str(target))
+    return staging_dir, paths
+
+
+def _process(path):
+    """Worker: PDF extraction + LLM parse (both cached by content hash)."""
+    try:
+        return get_parsed_resume(path)
+    finally:
+        # Worker threads open their own DB connections
+        connection.close()
+
+
+def _commit_batch(job, batch):
+    """Writes Candidates, ResumeAnalyses and CourseRecommendations for a batch."""
+    from hirelens_app.models import Candidate, CourseRecommendation, ResumeAnalysis
+
+    job_skills = split_skills(job.required_skills)
+    with transaction.atomic():
+        candidates, analyses, missing_per_row = [], [], []
+        for path, sha, text, parsed in batch:
+            candidate = Candidate(
+                name=(parsed.get("candidate_name") or Path(path).stem)[:120],
+                email=parsed.get("email") or "",
+                phone=(parsed.get("phone") or "")[:20],
+                resume_sha256=sha
+            )
+            with open(path, "rb") as f:
+                # Copies the file into MEDIA_ROOT/resumes/
+                candidate.resume.save(Path(path).name, File(f), save=False)
+            candidates.append(candidate)
+
+        candidates = Candidate.objects.bulk_create(candidates)
+
+        for candidate, (_, _, _, parsed) in zip(candidates, batch):
+            skills = [s.strip() for s in parsed.get("skills", []) if s.strip()]
+            scores, _, missing = skill_coverage([job_skills], skills)
+            analyses.append(ResumeAnalysis(
+                candidate=candidate,
+                job=job,
+                similarity_score=round(float(scores[0]), 1),
+                ai_summary=parsed.get("summary", "Analysis pending..."),
+                extracted_skills_list=",".join(skills)
+            ))
+            missing_per_row.append(missing[0])
+
+        analyses = ResumeAnalysis.objects.bulk_create(analyses)
+
+        CourseRecommendation.objects.bulk_create([
+            CourseRecommendation(
+                analysis=analysis,
+                skill_name=r["skill"],
+                course_name=r["course"],
+                course_link=r["link"]
+            )
+            for analysis, missing_skills in zip(analyses, missing_per_row)
+            for r in recommend_courses_smart(sorted(missing_skills))
+        ])
+
+    # Job-side vector index (best effort, like analyze_resume)
+    try:
+        import numpy as np
+        from .candidate_index import document_embedding, get_index
+
+        get_index().add(
+            [c.id for c in candidates],
+            np.vstack([document_embedding(text) for _, _, text, _ in batch])
+        )
+    except Exception as e:
+        print(f"Candidate Index Error: {e}")
+
+
+def ingest_resumes(paths, job, workers=DEFAULT_WORKERS, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """
+    Bulk pipeline: parse and match many resume PDFs against one job.
+
+    Extraction and LLM parsing fan out over a bounded thread pool; results
+    are committed in batches of batch_size. Files whose content hash is
+    already analysed for this job are skipped, so an interrupted run can
+    simply be started again; files that could not be extracted or parsed
+    count as failed and are not committed, so a new run retries them.
+    progress(stats) is called after every file.
+    Interview questions are not generated here (one LLM call per resume).
+    """
+    from hirelens_app.models import ResumeAnalysis
+
+    hashes, unreadable = {}, 0
+    for path in paths:
+        try:
+            hashes.setdefault(file_sha256(path), path)  # duplicates within the run count once
+        except OSError as e:
+            print(f"Ingest Error ({path}): {e}")
+            unreadable += 1
+
+    done_hashes = set(
+        ResumeAnalysis.objects.filter(job=job, candidate__resume_sha256__in=list(hashes))
+        .values_list("candidate__resume_sha256", flat=True)
+    )
+    todo = {sha: path for sha, path in hashes.items() if sha not in done_hashes}
+
+    stats = IngestStats(total=len(paths))
+    stats.failed = unreadable
+    stats.skipped = len(paths) - unreadable - len(todo)
+    if progress:
+        progress(stats)
+
+    batch = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_process, path): (sha, path) for sha, path in todo.items()}
+        try:
+            for future in as_completed(futures):
+                sha, path = futures[future]
+                try:
+                    text, parsed = future.result()
+                    if not text.strip():
+                        raise ValueError("no text could be extracted")
+                    if parse_failed(parsed):
+                        # Not committed, so the next run tries this file again
+                        raise ValueError("LLM resume parse failed")
+                    batch.append((path, sha, text, parsed))
+                except Exception as e:
+                    print(f"Ingest Error ({path}): {e}")
+                    stats.failed += 1
+
+                if len(batch) >= batch_size:
+                    _commit_batch(job, batch)
+                    stats.done += len(batch)
+                    batch = []
+                if progress:
+                    progress(stats)
+        except BaseException:
+            # e.g. progress() reporting a lost task lock: stop without
+            # waiting for the files not started yet
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    if batch:
+        _commit_batch(job, batch)
+        stats.done += len(batch)
+    if progress:
+        progress(stats)
+    return stats
+
+
+# -------------------------------------------------
+# Background ingestion of web uploads (task kind "bulk_ingest")
+# -------------------------------------------------
+def staging_root():
+    return Path(settings.MEDIA_ROOT) / STAGING_SUBDIR
+
+
+def _staging_dir(staging):
+    # The payload only carries the directory name, never a path
+    return staging_root() / os.path.basename(staging)
+
+
+def _progress_key(staging):
+    return f"bulk_ingest:{os.path.basename(staging)}"
+
+
+def get_progress(staging):
+    """Last stats (IngestStats.as_dict()) of a staged upload, or None."""
+    try:
+        return caches[PROGRESS_ALIAS].get(_progress_key(staging))
+    except Exception as e:
+        print(f"Ingest Progress Error: {e}")
+        return None
+
+
+def _set_progress(staging, stats):
+    try:
+        caches[PROGRESS_ALIAS].set(_progress_key(staging), stats.as_dict(), PROGRESS_TIMEOUT)
+    except Exception as e:
+        print(f"Ingest Progress Error: {e}")
+
+
+def queue_uploads(uploaded_files, job):
+    """
+    Stages the uploads under MEDIA_ROOT and queues their ingestion.
+    Returns the BackgroundTask.
+    """
+    from .task_queue import enqueue
+
+    staging_dir, paths = stage_uploads(uploaded_files, root=staging_root())
+    if not paths:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise ValueError("No PDF files found in the upload")
+    try:
+        staging = os.path.basename(staging_dir)
+        _set_progress(staging, IngestStats(total=len(paths)))
+        return enqueue("bulk_ingest", job_id=job.id, staging=staging)
+    except Exception:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+
+
+def ingest_staged(job_id, staging):
+    """Task stage: ingests a staged upload, then removes the staged files."""
+    from hirelens_app.models import CompanyRequirement
+    from .task_queue import heartbeat
+
+    def progress(stats):
+        _set_progress(staging, stats)
+        # A long run keeps its task lock fresh; if the task was requeued
+        # anyway, heartbeat raises and this run stops before the next batch
+        heartbeat()
+
+    job = CompanyRequirement.objects.get(id=job_id)
+    staging_dir = _staging_dir(staging)
+    # Reruns after a failed attempt skip what was already committed
+    ingest_resumes(collect_pdfs(staging_dir), job, progress=progress)
+    shutil.rmtree(staging_dir, ignore_errors=True)
+
+
+STAGES = [ingest_staged]
+
+
+def on_failure(error, job_id, staging):
+    shutil.rmtree(_staging_dir(staging), ignore_errors=True)
@@ -0,0 +1,203 @@
+import fcntl
+import heapq
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from .embedding import get_embeddings, split_windows
+
+BLOCK_ROWS = 65536
+DEFAULT_TOP_K = 20
+
+
+class CandidateIndex:
+    """
+    Append-only vector index of candidate resume embeddings.
+
+    Vectors live in a raw float16 matrix file and candidate ids in a
+    parallel int64 file, so the whole pool is memory-mapped rather than
+    loaded through the ORM. New resumes are appended under an exclusive
+    file lock, which keeps the index incremental and safe to share between
+    gunicorn workers.
+    """
+
+    def __init__(self, directory, dim):
+        self.directory = Path(directory)
+        self.dim = dim
+        self.vectors_path = self.directory / "vectors.f16"
+        self.ids_path = self.directory / "ids.i64"
+        self.lock_path = self.directory / "index.lock"
+
+    @contextmanager
+    def _locked(self, mode):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, mode)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @property
+    def _row_bytes(self):
+        return self.dim * np.dtype(np.float16).itemsize
+
+    def _rows(self):
+        """Number of complete rows present in both files."""
+        if not self.ids_path.exists() or not self.vectors_path.exists():
+            return 0
+        return min(
+            self.ids_path.stat().st_size // 8,
+            self.vectors_path.stat().st_size // self._row_bytes
+        )
+
+    def _truncate_to(self, n):
+        """
+        Cuts both files back to their first n rows. A crash between the two
+        appends of add() leaves vectors without ids (or a torn record);
+        appending after them would shift every later id onto the wrong
+        vector. Call with the exclusive lock held.
+        """
+        for path, size in ((self.vectors_path, n * self._row_bytes), (self.ids_path, n * 8)):
+            if path.exists() and path.stat().st_size > size:
+                os.truncate(path, size)
+
+    def _open(self):
+        """Returns (ids, vectors) as memory maps; empty arrays if no index yet."""
+        n = self._rows()
+        if n == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros((0, self.dim), dtype=np.float16)
+
+        ids = np.memmap(self.ids_path, dtype=np.int64, mode="r", shape=(n,))
+        vectors = np.memmap(self.vectors_path, dtype=np.float16, mode="r", shape=(n, self.dim))
+        return ids, vectors
+
+    def __len__(self):
+        return len(self._open()[0])
+
+    def indexed_ids(self):
+        return set(self._open()[0].tolist())
+
+    def vector(self, candidate_id):
+        """The stored (float32) vector of a candidate, or None if not indexed."""
+        ids, vectors = self._open()
+        rows = np.flatnonzero(np.asarray(ids) == candidate_id)
+        if len(rows) == 0:
+            return None
+        return np.asarray(vectors[rows[0]], dtype=np.float32)
+
+    def add(self, candidate_ids, vectors):
+        """Appends rows for candidates that are not indexed yet."""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        with self._locked(fcntl.LOCK_EX):
+            self._truncate_to(self._rows())
+            existing = self.indexed_ids()
+            keep = [i for i, cid in enumerate(candidate_ids) if cid not in existing]
+            if not keep:
+                return 0
+
+            new_ids = np.asarray([candidate_ids[i] for i in keep], dtype=np.int64)
+            new_vectors = vectors[keep].astype(np.float16)
+
+            # Vectors first: readers only trust rows present in both files
+            with open(self.vectors_path, "ab") as f:
+                f.write(new_vectors.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            with open(self.ids_path, "ab") as f:
+                f.write(new_ids.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+        return len(keep)
+
+    def search(self, query, top_k: int = DEFAULT_TOP_K, candidate_ids=None):
+        """
+        Top-K (candidate_id, score) pairs by cosine similarity, best first.
+
+        Scores are computed as blocked matrix-vector products over the
+        memory-mapped matrix; each block's best rows are merged into a
+        size-K min-heap. candidate_ids restricts the search to a pool.
+        """
+        ids, vectors = self._open()
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        allowed = None
+        if candidate_ids is not None:
+            allowed = np.fromiter(candidate_ids, dtype=np.int64)
+
+        heap = []
+        for start in range(0, len(ids), BLOCK_ROWS):
+            block_ids = np.asarray(ids[start:start + BLOCK_ROWS])
+            scores = vectors[start:start + BLOCK_ROWS].astype(np.float32) @ query
+
+            if allowed is not None:
+                mask = np.isin(block_ids, allowed)
+                block_ids, scores = block_ids[mask], scores[mask]
+
+            k = min(top_k, len(scores))
+            if k == 0:
+                continue
+            best = np.argpartition(-scores, k - 1)[:k]
+
+            for i in best:
+                item = (float(scores[i]), int(block_ids[i]))
+                if len(heap) < top_k:
+                    heapq.heappush(heap, item)
+                elif item[0] > heap[0][0]:
+                    heapq.heapreplace(heap, item)
+
+        return [(cid, score) for score, cid in sorted(heap, reverse=True)]
+
+
+def document_embedding(text):
+    """One normalized vector per document: the mean of its window embeddings."""
+    windows = split_windows(text)
+    vectors = get_embeddings(windows, batch_size=len(windows))
+    mean = vectors.mean(axis=0)
+    return mean / np.linalg.norm(mean)
+
+
+def job_query_text(job):
+    return f"{job.job_title}. Required skills: {job.required_skills}"
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> CandidateIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = CandidateIndex(
+                    settings.CANDIDATE_INDEX_DIR,
+                    settings.CANDIDATE_INDEX_DIM
+                )
+    return _index
+
+
+def index_candidate(candidate, resume_text):
+    """Embeds a candidate's resume once and appends it to the index."""
+    index = get_index()
+    if candidate.id in index.indexed_ids():
+        return False
+    return index.add([candidate.id], document_embedding(resume_text)[None, :]) > 0
+
+
+def rank_candidates(job, top_k: int = DEFAULT_TOP_K, pool_only: bool = True):
+    """
+    Ranks candidates for a CompanyRequirement by resume/job similarity.
+
+    With pool_only=True only candidates analysed against this job are
+    considered; otherwise the whole indexed talent pool is searched.
+    """
+    from hirelens_app.models import ResumeAnalysis
+
+    query = document_embedding(job_query_text(job))
+    pool = None
+    if pool_only:
+        pool = ResumeAnalysis.objects.filter(job=job).values_list("candidate_id", flat=True).distinct()
+    return get_index().search(query, top_k=top_k, candidate_ids=pool)
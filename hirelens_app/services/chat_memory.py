@@ -0,0 +1,132 @@
+from . import openai_client
+from .prompt_budget import CHAT_SUMMARY_TOKENS, trim_to_tokens
+
+# Bounded memory for the interview chat. Only the newest messages are sent
+# verbatim; older ones are folded into InterviewSession.summary by a
+# background task ("summarize_chat"), a batch at a time, so the summary is
+# updated incrementally and a turn costs the same at message 10 or 500.
+#
+# summarized_through is the id of the last message folded in; everything
+# after it is still verbatim. A chat turn reads the window from the hot
+# session state (session_state); the DB reads here fetch only the columns
+# they use.
+
+RECENT_MESSAGES = 8    # always sent verbatim
+FOLD_BATCH = 6         # fold once this many more have piled up behind them
+MAX_FOLD = 40          # messages folded per task (a lagging worker catches up in steps)
+
+SUMMARY_PROMPT = """
+You keep the running notes of a technical job interview.
+Update the notes with the new transcript lines below. Keep: which skills
+and projects were asked about, how well the candidate answered each, and
+which interview phase has been reached. Drop small talk. Reply with the
+updated notes only, at most 150 words.
+
+CURRENT NOTES:
+{summary}
+
+NEW TRANSCRIPT LINES:
+{transcript}
+"""
+
+
+def load_session(session_id):
+    from hirelens_app.models import InterviewSession
+
+    return InterviewSession.objects.only(
+        "id", "system_context", "summary", "summarized_through"
+    ).get(id=session_id)
+
+
+def window_rows(session_id, summarized_through, limit):
+    """(sender, text) of the newest `limit` messages not yet summarized, oldest first."""
+    from hirelens_app.models import ChatMessage
+
+    rows = list(
+        ChatMessage.objects
+        .filter(session_id=session_id, id__gt=summarized_through)
+        .order_by("-id")
+        .values_list("sender", "message_text")[:limit]
+    )
+    rows.reverse()
+    return rows
+
+
+def recent_history(state):
+    """
+    (summary, messages) for the next request from the session's hot state:
+    the rolling summary and the messages not yet folded into it, oldest
+    first. Once the window is full a fold is scheduled (once per state).
+    """
+    if len(state.window) >= RECENT_MESSAGES + FOLD_BATCH and not state.fold_scheduled:
+        from .session_state import save
+
+        schedule_fold(state.id)
+        state.fold_scheduled = True
+        save(state)
+
+    history = [
+        {"role": "assistant" if sender == 'ai' else "user", "content": text}
+        for sender, text in state.window
+    ]
+    return state.summary, history
+
+
+def schedule_fold(session_id):
+    """Queues a summarize_chat task unless one is already pending for the session."""
+    from .task_queue import enqueue_once
+
+    enqueue_once("summarize_chat", session_id=session_id)
+
+
+def _summarize(summary, rows):
+    transcript = "\n".join(
+        f"{'Interviewer' if sender == 'ai' else 'Candidate'}: {text}" for _, sender, text in rows
+    )
+    response = openai_client.chat_completion(
+        "summary",
+        model="gpt-4o-mini",
+        messages=[{"role": "user", "content": SUMMARY_PROMPT.format(
+            summary=summary or "(none yet)", transcript=transcript
+        )}],
+        temperature=0,
+        max_tokens=CHAT_SUMMARY_TOKENS,
+    )
+    return trim_to_tokens(response.choices[0].message.content.strip(), CHAT_SUMMARY_TOKENS)
+
+
+def fold(session_id):
+    """Folds the messages older than the recent window into the summary (task stage)."""
+    from hirelens_app.models import ChatMessage, InterviewSession
+    from .session_state import invalidate
+
+    session = load_session(session_id)
+    messages = ChatMessage.objects.filter(session_id=session_id, id__gt=session.summarized_through)
+
+    # Oldest message that stays verbatim; everything before it is folded
+    boundary = list(messages.order_by("-id").values_list("id", flat=True)[RECENT_MESSAGES - 1:RECENT_MESSAGES])
+    if not boundary:
+        return
+    rows = list(
+        messages.filter(id__lt=boundary[0])
+        .order_by("id")
+        .values_list("id", "sender", "message_text")[:MAX_FOLD]
+    )
+    if not rows:
+        return
+
+    summary = _summarize(session.summary, rows)
+
+    # Conditional on the old position: a concurrent fold that got there first wins
+    InterviewSession.objects.filter(
+        id=session_id, summarized_through=session.summarized_through
+    ).update(summary=summary, summarized_through=rows[-1][0])
+    invalidate(session_id)
+
+    if len(rows) == MAX_FOLD:
+        # More backlog; this task still counts as pending, so enqueue directly
+        from .task_queue import enqueue
+        enqueue("summarize_chat", session_id=session_id)
+
+
+STAGES = [fold]
@@ -1,26 +1,160 @@
-import torch
-from transformers import AutoTokenizer, AutoModel
+import threading
+
+import numpy as np
+from django.conf import settings
+from .embedding_backends import TORCH, load_backend
+from .embedding_cache import get_cache, make_key
 
 MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+MAX_LENGTH = 256
+BATCH_SIZE = 32
+WINDOW_STRIDE = 64  # tokens shared by neighbouring windows
 
-tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-model = AutoModel.from_pretrained(MODEL_NAME)
+# torch/transformers/onnxruntime and the model weights are loaded on first
+# use (or by warmup()), so importing this module stays cheap for migrate,
+# admin and tests.
+_backend = None
+_load_lock = threading.Lock()
 
-def get_embedding(text: str):
-    encoded = tokenizer(
+
+def backend_name():
+    return getattr(settings, "EMBEDDING_BACKEND", TORCH)
+
+
+def get_backend():
+    """Returns the configured embedding backend, loading it on first call."""
+    global _backend
+    if _backend is None:
+        with _load_lock:
+            if _backend is None:
+                _backend = load_backend(
+                    backend_name(),
+                    MODEL_NAME,
+                    getattr(settings, "EMBEDDING_ONNX_DIR", None)
+                )
+    return _backend
+
+
+def warmup():
+    """Loads the model and runs one tiny forward pass."""
+    _encode(["warmup"], BATCH_SIZE, MAX_LENGTH)
+
+
+def preload():
+    """
+    Loads and freezes the model in the gunicorn master before it forks.
+
+    Workers then share the weight pages copy-on-write. No forward pass is
+    run here: that would start torch's OpenMP pool, which does not survive
+    fork. gc.freeze() keeps the collector from writing to (and so
+    un-sharing) every object that already exists in the master.
+    """
+    import gc
+
+    get_backend().freeze()
+
+    gc.collect()
+    gc.freeze()
+
+
+def after_fork(num_threads: int = 1):
+    """Per-worker inference setup; called from gunicorn's post_fork hook."""
+    get_backend().set_num_threads(num_threads)
+
+
+def _encode(texts, batch_size, max_length, backend=None):
+    """
+    Runs the model over `texts` in as few forward passes as possible.
+
+    Inputs are sorted by token length so each batch is padded only up to
+    its own longest member.
+    """
+    backend = backend or get_backend()
+    result = np.zeros((len(texts), backend.hidden_size), dtype=np.float32)
+    if not texts:
+        return result
+
+    lengths = backend.tokenizer(
+        texts,
+        truncation=True,
+        max_length=max_length,
+        return_length=True
+    )["length"]
+    order = np.argsort(lengths, kind="stable")
+
+    for start in range(0, len(texts), batch_size):
+        batch_idx = order[start:start + batch_size]
+        result[batch_idx] = backend.embed_batch([texts[i] for i in batch_idx], max_length)
+
+    return result
+
+
+def get_embeddings(texts, batch_size: int = BATCH_SIZE, max_length: int = MAX_LENGTH,
+                   use_cache: bool = True):
+    """
+    Returns an (n, dim) float32 matrix of L2-normalized embeddings, in the
+    same order as `texts`. Texts already in the embedding cache never
+    reach the model; duplicates within one call are embedded once.
+    """
+    texts = list(texts)
+    if not use_cache:
+        return _encode(texts, batch_size, max_length)
+
+    # Quantized vectors differ slightly, so each backend has its own keys
+    cache = get_cache()
+    cache_model = f"{MODEL_NAME}@{backend_name()}"
+    keys = [make_key(cache_model, max_length, t) for t in texts]
+    found = cache.get_many(list(dict.fromkeys(keys)))
+
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in found and key not in missing:
+            missing[key] = text
+
+    if missing:
+        vectors = _encode(list(missing.values()), batch_size, max_length)
+        new_items = {key: vectors[i].copy() for i, key in enumerate(missing)}
+        cache.put_many(new_items)
+        found.update(new_items)
+
+    result = np.zeros((len(texts), _embedding_dim(found)), dtype=np.float32)
+    for i, key in enumerate(keys):
+        result[i] = found[key]
+    return result
+
+
+def split_windows(text: str, max_length: int = MAX_LENGTH, stride: int = WINDOW_STRIDE):
+    """
+    Splits a document into overlapping windows of at most max_length
+    tokens, returned as substrings of the original text. Short texts come
+    back as a single window.
+    """
+    encoded = get_backend().tokenizer(
         text,
-        return_tensors="pt",
         truncation=True,
-        max_length=256
+        max_length=max_length,
+        stride=stride,
+        return_overflowing_tokens=True,
+        return_offsets_mapping=True
     )
 
-    with torch.no_grad():
-        output = model(**encoded)
+    windows = []
+    for offsets in encoded["offset_mapping"]:
+        spans = [(start, end) for start, end in offsets if end > start]
+        if spans:
+            windows.append(text[spans[0][0]:spans[-1][1]])
+    return windows or [text]
 
-    token_embeddings = output.last_hidden_state
-    attention_mask = encoded["attention_mask"]
 
-    mask = attention_mask.unsqueeze(-1).expand(token_embeddings.size()).float()
-    embedding = (token_embeddings * mask).sum(dim=1) / mask.sum(dim=1)
+def _embedding_dim(vectors):
+    for vector in vectors.values():
+        return vector.shape[0]
+    return get_backend().hidden_size
 
-    return embedding.numpy()
+
+def cache_stats():
+    return get_cache().stats()
+
+
+def get_embedding(text: str):
+    return get_embeddings([text])
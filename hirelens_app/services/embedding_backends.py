@@ -0,0 +1,175 @@
+from pathlib import Path
+
+import numpy as np
+
+# Backends selectable through settings.EMBEDDING_BACKEND
+TORCH = "torch"
+ONNX = "onnx"
+ONNX_INT8 = "onnx-int8"
+BACKENDS = (TORCH, ONNX, ONNX_INT8)
+
+ONNX_FILES = {
+    ONNX: "model.onnx",
+    ONNX_INT8: "model.int8.onnx",
+}
+
+
+def mean_pool(token_embeddings, attention_mask):
+    """Masked mean over tokens followed by L2 normalization (numpy)."""
+    mask = attention_mask[..., None].astype(np.float32)
+    pooled = (token_embeddings * mask).sum(axis=1) / mask.sum(axis=1)
+    return pooled / np.linalg.norm(pooled, axis=1, keepdims=True)
+
+
+class TorchBackend:
+    """The reference fp32 PyTorch path."""
+
+    name = TORCH
+
+    def __init__(self, model_name):
+        from transformers import AutoTokenizer, AutoModel
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModel.from_pretrained(model_name)
+        self.model.eval()
+        self.hidden_size = self.model.config.hidden_size
+
+    def embed_batch(self, texts, max_length):
+        import torch
+
+        encoded = self.tokenizer(
+            texts,
+            return_tensors="pt",
+            padding=True,
+            truncation=True,
+            max_length=max_length
+        )
+
+        # inference_mode skips autograd version counters, so the shared
+        # weight tensors are only ever read after fork
+        with torch.inference_mode():
+            output = self.model(**encoded)
+
+        token_embeddings = output.last_hidden_state
+        mask = encoded["attention_mask"].unsqueeze(-1).expand(token_embeddings.size()).float()
+        pooled = (token_embeddings * mask).sum(dim=1) / mask.sum(dim=1)
+        return torch.nn.functional.normalize(pooled, p=2, dim=1).numpy()
+
+    def freeze(self):
+        for param in self.model.parameters():
+            param.requires_grad_(False)
+
+    def set_num_threads(self, num_threads):
+        import torch
+
+        torch.set_num_threads(num_threads)
+
+
+class OnnxBackend:
+    """
+    onnxruntime CPU path over a graph exported by export_onnx(), either
+    fp32 or dynamically int8-quantized. Pooling is done in numpy with the
+    same masked mean as the torch path.
+    """
+
+    def __init__(self, model_name, model_path, name=ONNX):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.name = name
+        self.model_path = str(model_path)
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self._ort = ort
+        self._threads = 0
+        self.session = self._new_session()
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.hidden_size = self.session.get_outputs()[0].shape[-1]
+
+    def _new_session(self):
+        options = self._ort.SessionOptions()
+        options.intra_op_num_threads = self._threads
+        return self._ort.InferenceSession(
+            self.model_path,
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+
+    def embed_batch(self, texts, max_length):
+        encoded = self.tokenizer(
+            texts,
+            return_tensors="np",
+            padding=True,
+            truncation=True,
+            max_length=max_length
+        )
+        feeds = {name: encoded[name].astype(np.int64) for name in self.input_names}
+        token_embeddings = self.session.run(None, feeds)[0]
+        return mean_pool(token_embeddings, encoded["attention_mask"]).astype(np.float32)
+
+    def freeze(self):
+        pass
+
+    def set_num_threads(self, num_threads):
+        self._threads = num_threads
+        self.session = self._new_session()
+
+
+def load_backend(name, model_name, onnx_dir):
+    if name == TORCH:
+        return TorchBackend(model_name)
+    if name in ONNX_FILES:
+        path = Path(onnx_dir) / ONNX_FILES[name]
+        if not path.exists():
+            raise FileNotFoundError(
+                f"{path} not found; run `python manage.py export_embedding_onnx` first"
+            )
+        return OnnxBackend(model_name, path, name=name)
+    raise ValueError(f"Unknown EMBEDDING_BACKEND {name!r}; choose one of {BACKENDS}")
+
+
+def export_onnx(model_name, onnx_dir, opset: int = 17):
+    """
+    Exports the transformer (without pooling) to ONNX and writes a
+    dynamically int8-quantized copy next to it. Returns both paths.
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoTokenizer, AutoModel
+
+    onnx_dir = Path(onnx_dir)
+    onnx_dir.mkdir(parents=True, exist_ok=True)
+    fp32_path = onnx_dir / ONNX_FILES[ONNX]
+    int8_path = onnx_dir / ONNX_FILES[ONNX_INT8]
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name)
+    model.eval()
+
+    sample = tokenizer(["an example sentence"], return_tensors="pt")
+    input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+
+    class _Encoder(torch.nn.Module):
+        # Fixes the positional signature and returns only the hidden state
+        def __init__(self):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(input_names, inputs))).last_hidden_state
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            _Encoder(),
+            tuple(sample[n] for n in input_names),
+            str(fp32_path),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            dynamo=False,
+        )
+
+    quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+    return fp32_path, int8_path
@@ -0,0 +1,158 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from django.conf import settings
+
+DEFAULT_MEMORY_ITEMS = 10000
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.split())
+
+
+def make_key(model_name: str, max_length: int, text: str) -> str:
+    raw = f"{model_name}\0{max_length}\0{normalize_text(text)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Two-tier, content-addressed cache for embedding vectors.
+
+    Tier 1 is an in-process LRU dict. Tier 2 is a SQLite file of float32
+    blobs that every worker process on the box reads and writes, so a
+    phrase embedded by one gunicorn worker is a hit for all the others.
+    Pass path=None for a memory-only cache.
+    """
+
+    def __init__(self, path=None, max_items: int = DEFAULT_MEMORY_ITEMS):
+        self.path = str(path) if path else None
+        self.max_items = max_items
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # ---------------------------------------------
+    # SQLite tier
+    # ---------------------------------------------
+    def _connection(self):
+        # Connections must not cross a fork or a thread boundary
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, dim INTEGER NOT NULL, vector BLOB NOT NULL)"
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _disk_get(self, keys):
+        if not self.path or not keys:
+            return {}
+        found = {}
+        conn = self._connection()
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                chunk
+            )
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def _disk_put(self, items):
+        if not self.path or not items:
+            return
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, dim, vector) VALUES (?, ?, ?)",
+                [(k, v.shape[0], v.astype(np.float32).tobytes()) for k, v in items.items()]
+            )
+
+    # ---------------------------------------------
+    # Memory tier
+    # ---------------------------------------------
+    def _remember(self, key, vector):
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_items:
+            self._lru.popitem(last=False)
+
+    # ---------------------------------------------
+    # Public API
+    # ---------------------------------------------
+    def get_many(self, keys):
+        """Returns {key: vector} for every key found in either tier."""
+        found = {}
+        pending = []
+        with self._lock:
+            for key in keys:
+                vector = self._lru.get(key)
+                if vector is None:
+                    pending.append(key)
+                else:
+                    self._lru.move_to_end(key)
+                    found[key] = vector
+            self.memory_hits += len(found)
+
+        from_disk = self._disk_get(pending)
+        with self._lock:
+            for key, vector in from_disk.items():
+                self._remember(key, vector)
+            self.disk_hits += len(from_disk)
+            self.misses += len(pending) - len(from_disk)
+
+        found.update(from_disk)
+        return found
+
+    def put_many(self, items):
+        """Stores {key: vector} in both tiers."""
+        with self._lock:
+            for key, vector in items.items():
+                self._remember(key, vector)
+        self._disk_put(items)
+
+    def clear_memory(self):
+        with self._lock:
+            self._lru.clear()
+
+    def stats(self):
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "memory_items": len(self._lru),
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> EmbeddingCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = EmbeddingCache(
+                    path=getattr(settings, "EMBEDDING_CACHE_PATH", None),
+                    max_items=getattr(settings, "EMBEDDING_CACHE_MEMORY_ITEMS", DEFAULT_MEMORY_ITEMS)
+                )
+    return _cache
@@ -0,0 +1,71 @@
+import time
+
+import numpy as np
+
+# Fixed corpus for backend accuracy checks: skill phrases scored against
+# resume-style sentences, the same shape of work skill matching does.
+SKILL_PHRASES = [
+    "python", "django", "react", "aws", "javascript", "rust",
+    "machine learning", "rest api design", "sql databases", "docker kubernetes",
+    "team leadership", "communication",
+]
+
+RESUME_SENTENCES = [
+    "Built a multi-tenant SaaS backend in Django and Django REST Framework.",
+    "Designed PostgreSQL schemas and tuned slow queries for a reporting service.",
+    "Led a team of five engineers delivering a React and TypeScript dashboard.",
+    "Deployed containerised microservices on AWS ECS with Terraform.",
+    "Wrote data pipelines in Python using pandas and Airflow.",
+    "Trained gradient boosted models to predict customer churn.",
+    "Maintained CI/CD pipelines with GitHub Actions and Docker.",
+    "Presented quarterly roadmap updates to executive stakeholders.",
+    "Implemented a lock-free queue in Rust for a low-latency trading gateway.",
+    "Migrated a legacy jQuery frontend to modern JavaScript modules.",
+    "Mentored junior developers through code reviews and pair programming.",
+    "Exposed inventory data through a versioned REST API with OAuth2.",
+    "Managed Kubernetes clusters and Helm charts for staging and production.",
+    "Fine-tuned transformer models for resume entity extraction.",
+    "Volunteered as a weekend football coach for a youth team.",
+    "Bachelor of Science in Computer Science, graduated with honours.",
+]
+
+
+def cosine_matrix(backend, max_length: int = 256):
+    skills = backend.embed_batch(SKILL_PHRASES, max_length)
+    sentences = backend.embed_batch(RESUME_SENTENCES, max_length)
+    return skills @ sentences.T
+
+
+def accuracy_report(candidate, reference):
+    """
+    Compares a backend's skills x sentences cosine scores with the fp32
+    reference. top1_agreement is the share of skills whose best evidence
+    sentence is unchanged.
+    """
+    ref = cosine_matrix(reference)
+    got = cosine_matrix(candidate)
+    diff = np.abs(got - ref)
+    return {
+        "backend": candidate.name,
+        "max_abs_diff": float(diff.max()),
+        "mean_abs_diff": float(diff.mean()),
+        "top1_agreement": float((got.argmax(axis=1) == ref.argmax(axis=1)).mean()),
+    }
+
+
+def throughput(backend, batch_size: int = 32, repeats: int = 5, max_length: int = 256):
+    """Sentences per second over the corpus, after one warm-up pass."""
+    texts = (RESUME_SENTENCES + SKILL_PHRASES) * 4
+    backend.embed_batch(texts[:batch_size], max_length)
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for i in range(0, len(texts), batch_size):
+            backend.embed_batch(texts[i:i + batch_size], max_length)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "backend": backend.name,
+        "sentences_per_sec": round(len(texts) * repeats / elapsed, 1),
+        "ms_per_batch": round(elapsed * 1000 / (repeats * -(-len(texts) // batch_size)), 2),
+    }
@@ -1,10 +1,12 @@
+import asyncio
 import json
-from .llm_engine import query_llm
+import re
+from . import openai_client
+from .llm_engine import aquery_llm, query_llm
+from .prompt_budget import ANSWER_TOKENS, trim_to_tokens
 
-def generate_ai_questions(skills, job_role, experience_level):
-    """Generates 5 unique interview questions based on candidate skills"""
-    
-    prompt = f"""
+def _questions_prompt(skills, job_role, experience_level):
+    return f"""
     Generate 5 technical interview questions for a '{job_role}' position.
     Candidate Skills: {', '.join(skills)}.
     Experience Level: {experience_level} years.
@@ -17,21 +19,27 @@ def generate_ai_questions(skills, job_role, experience_level):
         ]
     }}
     """
-    
-    res = query_llm(prompt, json_mode=True)
+
+def _load_questions(res):
     try:
         data = json.loads(res)
         return data.get("questions", [])
     except:
         return []
 
-def evaluate_answer(question_text, candidate_answer):
-    """Grades the answer"""
-    
-    prompt = f"""
+def generate_ai_questions(skills, job_role, experience_level):
+    """Generates 5 unique interview questions based on candidate skills"""
+    return _load_questions(query_llm(_questions_prompt(skills, job_role, experience_level), json_mode=True, site="questions"))
+
+async def agenerate_ai_questions(skills, job_role, experience_level):
+    """Async generate_ai_questions (same prompt, non-blocking LLM call)"""
+    return _load_questions(await aquery_llm(_questions_prompt(skills, job_role, experience_level), json_mode=True, site="questions"))
+
+def _grade_prompt(question_text, candidate_answer):
+    return f"""
     You are a technical interviewer. 
     Question: "{question_text}"
-    Candidate Answer: "{candidate_answer}"
+    Candidate Answer: "{trim_to_tokens(candidate_answer, ANSWER_TOKENS)}"
     
     Evaluate the answer and return strictly JSON:
     {{
@@ -40,9 +48,122 @@ def evaluate_answer(question_text, candidate_answer):
         "is_correct": (Boolean)
     }}
     """
-    
-    res = query_llm(prompt, json_mode=True)
+
+def _load_grade(res):
     try:
         return json.loads(res)
     except:
-        return {"score": 0, "feedback": "AI Evaluation Failed", "is_correct": False}
\ No newline at end of file
+        return {"score": 0, "feedback": "AI Evaluation Failed", "is_correct": False}
+
+def evaluate_answer(question_text, candidate_answer):
+    """Grades the answer"""
+    # Same answer to the same question always gets the same grade
+    return _load_grade(query_llm(_grade_prompt(question_text, candidate_answer), json_mode=True, deterministic=True, site="grading"))
+
+async def aevaluate_answer(question_text, candidate_answer):
+    """Async evaluate_answer (same prompt, non-blocking LLM call)"""
+    return _load_grade(await aquery_llm(_grade_prompt(question_text, candidate_answer), json_mode=True, deterministic=True, site="grading"))
+
+
+# Batch grading: one structured request grades up to GRADE_BATCH_SIZE
+# answers, and at most GRADE_CONCURRENCY such requests are in flight, so a
+# whole interview costs about one LLM round trip instead of one per answer.
+GRADE_BATCH_SIZE = 10
+GRADE_CONCURRENCY = 4
+
+def _batch_grade_prompt(pairs):
+    answers = "\n".join(
+        f'''    {i}. Question: "{question}"
+       Candidate Answer: "{trim_to_tokens(answer, ANSWER_TOKENS)}"'''
+        for i, (question, answer) in enumerate(pairs, 1)
+    )
+    return f"""
+    You are a technical interviewer. Evaluate each numbered answer on its own.
+
+{answers}
+
+    Return strictly JSON with exactly one entry per answer:
+    {{
+        "results": [
+            {{
+                "index": (Integer, the answer's number),
+                "score": (Integer 0-100),
+                "feedback": "Constructive feedback explaining what was right/wrong (max 2 sentences)",
+                "is_correct": (Boolean)
+            }}
+        ]
+    }}
+    """
+
+def _score(value):
+    """Integer score in 0-100 from what the model returned (85, 85.0, "85/100", ...)."""
+    if isinstance(value, bool):
+        return 0
+    if not isinstance(value, (int, float)):
+        match = re.search(r"-?\d+(?:\.\d+)?", str(value))
+        value = float(match.group()) if match else 0
+    return max(0, min(100, int(round(value))))
+
+class GradingFailed(Exception):
+    """The LLM gave no usable grade (API failure or malformed response)."""
+
+def _load_batch(res, count):
+    """Grades by position; None where the response has no usable entry."""
+    grades = [None] * count
+    try:
+        results = json.loads(res).get("results", [])
+    except (json.JSONDecodeError, AttributeError):
+        return grades
+    for item in results:
+        if not isinstance(item, dict) or "score" not in item:
+            continue
+        index = item.get("index")
+        if isinstance(index, int) and 1 <= index <= count:
+            grades[index - 1] = dict(item, score=_score(item["score"]))
+    return grades
+
+async def _agrade_single(pair, semaphore):
+    async with semaphore:
+        res = await aquery_llm(_grade_prompt(*pair), json_mode=True, deterministic=True, site="grading")
+    try:
+        grade = json.loads(res)
+    except json.JSONDecodeError:
+        grade = None
+    if not isinstance(grade, dict) or "score" not in grade:
+        raise GradingFailed("no grade for an answer")
+    return dict(grade, score=_score(grade["score"]))
+
+async def _agrade_batch(pairs, semaphore):
+    async with semaphore:
+        res = await aquery_llm(_batch_grade_prompt(pairs), json_mode=True, deterministic=True, site="batch_grading")
+    grades = _load_batch(res, len(pairs))
+    if not any(grades):
+        # "{}" from a failed API call, or nothing usable: don't hammer the
+        # API with one request per answer, let the caller retry later
+        raise GradingFailed("batch grading returned no grades")
+
+    # Answers the batch response left out are graded one by one, within
+    # the same concurrency limit
+    missing = [i for i, grade in enumerate(grades) if grade is None]
+    if missing:
+        singles = await asyncio.gather(*(_agrade_single(pairs[i], semaphore) for i in missing))
+        for i, grade in zip(missing, singles):
+            grades[i] = grade
+    return grades
+
+async def aevaluate_answers(pairs):
+    """Async evaluate_answers"""
+    pairs = list(pairs)
+    semaphore = asyncio.Semaphore(GRADE_CONCURRENCY)
+    batches = await asyncio.gather(*(
+        _agrade_batch(pairs[i:i + GRADE_BATCH_SIZE], semaphore)
+        for i in range(0, len(pairs), GRADE_BATCH_SIZE)
+    ))
+    return [grade for batch in batches for grade in batch]
+
+def evaluate_answers(pairs):
+    """
+    Grades a list of (question, answer) pairs; results in the same order.
+    Raises GradingFailed unless every answer got a real grade.
+    """
+    return openai_client.run(aevaluate_answers(pairs))
@@ -0,0 +1,66 @@
+from django.db import transaction
+
+from . import session_state
+from .interview_engine import evaluate_answers
+
+# Grading of a finished chat interview (task kind "grade_interview"). Each
+# AI message the candidate replied to becomes one InterviewResult; all
+# answers are graded together (see evaluate_answers, about one LLM round
+# trip per interview) and the rows are written with a single bulk_create.
+
+
+def transcript_pairs(session_id):
+    """(question, answer) for every AI message the candidate replied to, in order."""
+    from hirelens_app.models import ChatMessage
+
+    pairs, question, answer = [], None, []
+    messages = (
+        ChatMessage.objects.filter(session_id=session_id)
+        .order_by("id")
+        .values_list("sender", "message_text")
+    )
+    for sender, text in messages:
+        if sender == 'ai':
+            if question is not None and answer:
+                pairs.append((question, "\n".join(answer)))
+            question, answer = text, []
+        elif question is not None:
+            answer.append(text)
+    if question is not None and answer:
+        pairs.append((question, "\n".join(answer)))
+    return pairs
+
+
+def grade_session(session_id):
+    """Task stage: grades the transcript, replacing earlier results of the session."""
+    from hirelens_app.models import InterviewResult
+
+    pairs = transcript_pairs(session_id)
+    # Raises GradingFailed when the LLM gives no grades: the task is retried
+    # and no placeholder scores are saved as results
+    grades = evaluate_answers(pairs) if pairs else []
+
+    with transaction.atomic():
+        InterviewResult.objects.filter(session_id=session_id).delete()
+        InterviewResult.objects.bulk_create([
+            InterviewResult(
+                session_id=session_id,
+                question_text=question,
+                candidate_answer=answer,
+                ai_score=grade["score"],
+                ai_feedback=grade.get("feedback", "No feedback generated."),
+                is_correct=grade.get("is_correct", False)
+            )
+            for (question, answer), grade in zip(pairs, grades)
+        ])
+
+
+def end_session(session_id):
+    """Marks the interview completed and queues the grading of its transcript."""
+    from .task_queue import enqueue_once
+
+    session_state.complete(session_id)
+    enqueue_once("grade_interview", session_id=session_id)
+
+
+STAGES = [grade_session]
@@ -0,0 +1,102 @@
+from django.conf import settings
+
+from . import session_state
+from .rag_service import CHAT_FALLBACK, build_rag_context, get_ai_response
+from .resume_chunks import index_session
+from .resume_cache import get_resume_text
+
+# Interview sessions prepared ahead of time (task kind "prewarm_interview"):
+# resume chunks, RAG context and the opening question are built in the
+# background once an analysis is done, or when HR opens its result page.
+# Starting the interview then only claims a ready session (is_started=False,
+# is_ready=True). A pre-warmed session is created not ready and only marked
+# ready once its opening question is stored, so it is never claimed half built.
+
+OPENING_MESSAGE = "Start the interview now."
+CLAIM_SCAN = 5
+
+
+def create_session(analysis, started=True):
+    """Builds a session: resume chunks, RAG context and the opening AI message."""
+    from hirelens_app.models import InterviewSession
+
+    # Resume text comes from the parse cache filled during analysis
+    resume_text = get_resume_text(analysis.candidate.resume.path)
+
+    # The resume is chunked and embedded once here and each turn retrieves
+    # only the relevant chunks (whole resume as fallback)
+    session = InterviewSession.objects.create(analysis=analysis, is_started=started, is_ready=started)
+    retrieval = index_session(session, resume_text) > 0
+    session.system_context = build_rag_context(resume_text, analysis.job.required_skills, retrieval=retrieval)
+    session.save(update_fields=["system_context"])
+
+    greeting = get_ai_response(session.id, user_message=OPENING_MESSAGE)
+    if greeting == CHAT_FALLBACK and not started:
+        # A waiting session must not open with the error text; the task
+        # retries. Not ready yet, so no candidate can be using it.
+        session.delete()
+        raise RuntimeError("LLM returned no opening question")
+
+    session_state.append(session.id, 'ai', greeting)
+    if not started:
+        # update() rather than save(): keeps the cached state just written
+        InterviewSession.objects.filter(id=session.id).update(is_ready=True)
+        session.is_ready = True
+    return session
+
+
+def claim_session(analysis_id):
+    """
+    Id of a pre-warmed session of the analysis, now marked started, or None.
+    The conditional UPDATE lets only one request claim each session.
+    """
+    from hirelens_app.models import InterviewSession
+
+    ready = (
+        InterviewSession.objects
+        .filter(analysis_id=analysis_id, is_started=False, is_ready=True)
+        .order_by("id")
+        .values_list("id", flat=True)[:CLAIM_SCAN]
+    )
+    for session_id in list(ready):
+        if InterviewSession.objects.filter(id=session_id, is_started=False).update(is_started=True):
+            return session_id
+    return None
+
+
+def _has_session(analysis_id):
+    """Whether the analysis has an open, finished or pre-warmed session (half-built ones don't count)."""
+    from hirelens_app.models import InterviewSession
+
+    return InterviewSession.objects.filter(analysis_id=analysis_id, is_ready=True).exists()
+
+
+def schedule_prewarm(analysis_id):
+    """
+    Queues a prewarm_interview task while the analysis has no session yet.
+    Once one is pre-warmed, claimed or finished, reloading the result page
+    queues nothing; enqueue_once covers a task that is already pending.
+    """
+    from .task_queue import enqueue_once
+
+    if not getattr(settings, "INTERVIEW_PREWARM", False):
+        return
+    if _has_session(analysis_id):
+        return
+    enqueue_once("prewarm_interview", analysis_id=analysis_id)
+
+
+def prepare(analysis_id):
+    """Task stage: one pre-warmed session per analysis that has none yet."""
+    from hirelens_app.models import InterviewSession, ResumeAnalysis
+
+    if _has_session(analysis_id):
+        return
+    # Leftovers of an attempt that crashed mid-build; they cannot be claimed
+    for session in InterviewSession.objects.filter(analysis_id=analysis_id, is_started=False, is_ready=False):
+        session.delete()
+    analysis = ResumeAnalysis.objects.select_related("candidate", "job").get(id=analysis_id)
+    create_session(analysis, started=False)
+
+
+STAGES = [prepare]
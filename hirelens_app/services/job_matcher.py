@@ -0,0 +1,226 @@
+import numpy as np
+from django.db import transaction
+
+from .course_recommender import recommend_courses_smart
+from .resume_cache import cached_parse, get_resume_entry, store_parse
+from .resume_parser import parse_failed, parse_resume_text
+
+
+def skill_matches(req, cand):
+    """
+    Strict Check: Requirement must explicitly exist or be a clear parent.
+    e.g. "react" matches "reactjs" or "react.js", but "java" does NOT match "javascript"
+    """
+    if req == cand:  # Exact match
+        return True
+    if req in cand and len(cand) < len(req) + 4:  # Allow "react" -> "reactjs"
+        return True
+    return f" {req} " in f" {cand} "  # Word boundary match "core java" -> "java"
+
+
+def split_skills(text):
+    return [s.strip().lower() for s in text.split(",") if s.strip()]
+
+
+def skill_coverage(job_skill_lists, candidate_skills):
+    """
+    Scores one candidate against many jobs in a single vectorized pass.
+
+    Every distinct required skill is checked against the candidate once;
+    per-job coverage is then a jobs x skills incidence-matrix product.
+    Returns (scores in %, [matched set per job], [missing set per job]).
+    """
+    vocab = sorted({s for skills in job_skill_lists for s in skills})
+    if not vocab:
+        empty = [set() for _ in job_skill_lists]
+        return np.zeros(len(job_skill_lists)), empty, [set() for _ in job_skill_lists]
+
+    column = {s: i for i, s in enumerate(vocab)}
+    cand_lower = [c.lower() for c in candidate_skills]
+    present = np.array(
+        [any(skill_matches(req, cand) for cand in cand_lower) for req in vocab],
+        dtype=np.float32
+    )
+
+    incidence = np.zeros((len(job_skill_lists), len(vocab)), dtype=np.float32)
+    for row, skills in enumerate(job_skill_lists):
+        incidence[row, [column[s] for s in skills]] = 1.0
+
+    required = incidence.sum(axis=1)
+    matched_counts = incidence @ present
+    scores = np.divide(matched_counts * 100, required, out=np.zeros_like(required), where=required > 0)
+
+    hits = incidence.astype(bool) & present.astype(bool)
+    misses = incidence.astype(bool) & ~present.astype(bool)
+    vocab = np.array(vocab, dtype=object)
+    matched = [set(vocab[row]) for row in hits]
+    missing = [set(vocab[row]) for row in misses]
+    return scores, matched, missing
+
+
+def semantic_job_scores(resume_text, jobs):
+    """
+    Cosine similarity of the resume against every job's requirements:
+    one batched embedding call for the job texts and one matmul.
+    Returns (scores, resume_vector).
+    """
+    from .candidate_index import document_embedding, job_query_text
+    from .embedding import get_embeddings
+
+    resume_vector = document_embedding(resume_text)
+    job_vectors = get_embeddings([job_query_text(job) for job in jobs])
+    return job_vectors @ resume_vector, resume_vector
+
+
+def _semantic_scores(candidate, resume_text, jobs):
+    """
+    Semantic match (%) per job, or None each if embedding is unavailable.
+    Ingest side: embeds the resume and adds it to the candidate index.
+    """
+    try:
+        from .candidate_index import get_index
+
+        sims, resume_vector = semantic_job_scores(resume_text, jobs)
+        get_index().add([candidate.id], resume_vector[None, :])
+        return [round(float(s) * 100, 1) for s in sims]
+    except Exception as e:
+        print(f"Semantic Matching Error: {e}")
+        return [None] * len(jobs)
+
+
+def _indexed_semantic_scores(candidate, jobs):
+    """
+    Read side of _semantic_scores: the resume vector comes from the
+    candidate index (None each if the candidate is not indexed yet), so
+    the resume is never embedded again. Job texts hit the embedding cache.
+    """
+    try:
+        from .candidate_index import get_index, job_query_text
+        from .embedding import get_embeddings
+
+        resume_vector = get_index().vector(candidate.id)
+        if resume_vector is None:
+            return [None] * len(jobs)
+        sims = get_embeddings([job_query_text(job) for job in jobs]) @ resume_vector
+        return [round(float(s) * 100, 1) for s in sims]
+    except Exception as e:
+        print(f"Semantic Matching Error: {e}")
+        return [None] * len(jobs)
+
+
+def _ranked(analyses, semantic):
+    results = list(zip(analyses, semantic))
+    results.sort(key=lambda r: (r[0].similarity_score, r[1] or 0.0), reverse=True)
+    return results
+
+
+def job_matches(candidate, jobs):
+    """
+    Read-only view of match_resume_to_jobs: the candidate's existing
+    analyses for these jobs with their semantic scores read from the
+    candidate index (no LLM call, no embedding of the resume, no writes).
+    Returns ([(analysis, semantic_score or None)], unmatched jobs).
+    """
+    from hirelens_app.models import ResumeAnalysis
+
+    jobs = list(jobs)
+    by_job = {
+        a.job_id: a
+        for a in ResumeAnalysis.objects.filter(candidate=candidate, job__in=jobs)
+        .select_related("job").order_by("id")
+    }
+    matched = [job for job in jobs if job.id in by_job]
+    unmatched = [job for job in jobs if job.id not in by_job]
+    if not matched:
+        return [], unmatched
+
+    semantic = _indexed_semantic_scores(candidate, matched)
+    return _ranked([by_job[job.id] for job in matched], semantic), unmatched
+
+
+def match_resume_to_jobs(candidate, jobs):
+    """
+    Analyses one resume against many CompanyRequirements at once.
+
+    The PDF is extracted and LLM-parsed once (or not at all if its bytes
+    are already in the resume parse cache), the resume is embedded once
+    (and added to the candidate index), every job is scored in one
+    vectorized pass and all ResumeAnalysis / CourseRecommendation rows are
+    written with bulk_create. Per-job interview questions are not
+    generated here; that would cost one LLM call per job.
+
+    Jobs the candidate already has an analysis for are reused, not
+    analysed again, so running this twice creates no duplicates. A failed
+    parse raises before anything is written.
+
+    Returns [(analysis, semantic_score or None)] sorted best match first.
+    """
+    from hirelens_app.models import CourseRecommendation, ResumeAnalysis
+
+    jobs = list(jobs)
+    if not jobs:
+        return []
+
+    existing = {
+        a.job_id: a
+        for a in ResumeAnalysis.objects.filter(candidate=candidate, job__in=jobs).order_by("id")
+    }
+    new_jobs = [job for job in jobs if job.id not in existing]
+
+    entry = get_resume_entry(candidate.resume.path)
+    if not entry.extracted_text.strip():
+        raise ValueError("no text could be extracted from the resume")
+    resume_text, parsed_data = entry.extracted_text, cached_parse(entry)
+    if parsed_data is None:
+        parsed_data = parse_resume_text(resume_text)
+        if parse_failed(parsed_data):
+            raise ValueError("LLM resume parse failed")
+        store_parse(entry, parsed_data)
+
+    extracted_skills = [s.strip() for s in parsed_data.get("skills", []) if s.strip()]
+    ai_summary = parsed_data.get("summary", "Analysis pending...")
+
+    semantic = _semantic_scores(candidate, resume_text, jobs)
+
+    created = []
+    if new_jobs:
+        scores, _, missing = skill_coverage([split_skills(j.required_skills) for j in new_jobs], extracted_skills)
+
+        with transaction.atomic():
+            created = ResumeAnalysis.objects.bulk_create([
+                ResumeAnalysis(
+                    candidate=candidate,
+                    job=job,
+                    similarity_score=round(float(score), 1),
+                    ai_summary=ai_summary,
+                    extracted_skills_list=",".join(extracted_skills)
+                )
+                for job, score in zip(new_jobs, scores)
+            ])
+
+            course_rows = []
+            for analysis, missing_skills in zip(created, missing):
+                for r in recommend_courses_smart(sorted(missing_skills)):
+                    course_rows.append(CourseRecommendation(
+                        analysis=analysis,
+                        skill_name=r["skill"],
+                        course_name=r["course"],
+                        course_link=r["link"]
+                    ))
+            CourseRecommendation.objects.bulk_create(course_rows)
+
+    by_job = dict(existing)
+    by_job.update((a.job_id, a) for a in created)
+    return _ranked([by_job[job.id] for job in jobs], semantic)
+
+
+# Background stage of task kind "match_all_jobs" (queued by the upload and
+# match_all_jobs views): every job of the HR, as of when the task runs.
+def match_all(candidate_id, hr_id):
+    from hirelens_app.models import Candidate, CompanyRequirement
+
+    candidate = Candidate.objects.get(id=candidate_id)
+    match_resume_to_jobs(candidate, CompanyRequirement.objects.filter(hr_id=hr_id))
+
+
+STAGES = [match_all]
@@ -0,0 +1,76 @@
+import hashlib
+import json
+import threading
+
+from django.core.cache import caches
+
+# Django cache alias (see CACHES in settings); TTL and the size bound
+# (TIMEOUT / MAX_ENTRIES) are configured there
+CACHE_ALIAS = "llm"
+KEY_VERSION = 1
+
+
+class LLMCacheStats:
+    """Per-process counters; saved_seconds sums the original latency of every hit."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+
+    def record(self, hit, latency=0.0):
+        with self._lock:
+            if hit:
+                self.hits += 1
+                self.saved_seconds += latency
+            else:
+                self.misses += 1
+
+    def as_dict(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "saved_seconds": round(self.saved_seconds, 2),
+        }
+
+
+_stats = LLMCacheStats()
+
+
+def make_key(request):
+    """Key over everything that determines the completion: model, messages, format, temperature."""
+    payload = json.dumps(request, sort_keys=True, ensure_ascii=False)
+    return "llm:" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def lookup(request):
+    """Cached completion text for this request, or None."""
+    try:
+        entry = caches[CACHE_ALIAS].get(make_key(request), version=KEY_VERSION)
+    except Exception as e:
+        print(f"LLM Cache Error: {e}")
+        entry = None
+
+    if entry is None:
+        _stats.record(hit=False)
+        return None
+    _stats.record(hit=True, latency=entry["latency"])
+    return entry["content"]
+
+
+def store(request, content, latency):
+    try:
+        caches[CACHE_ALIAS].set(
+            make_key(request),
+            {"content": content, "latency": latency},
+            version=KEY_VERSION
+        )
+    except Exception as e:
+        print(f"LLM Cache Error: {e}")
+
+
+def stats():
+    return _stats.as_dict()
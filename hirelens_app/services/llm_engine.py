@@ -1,39 +1,109 @@
 # hirelens_app/services/llm_engine.py
-import os
 import json
-from openai import OpenAI
-from django.conf import settings
+import time
 
-# Initialize Client (It automatically looks for OPENAI_API_KEY in env vars)
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
+from . import llm_cache, openai_client, single_flight
 
-def query_llm(prompt: str, json_mode: bool = False) -> str:
+MODEL = "gpt-4o-mini"  # best speed/cost balance
+SYSTEM_PROMPT = "You are a helpful AI assistant for a hiring platform."
+
+
+def _request(prompt, json_mode, deterministic=False):
+    return {
+        "model": MODEL,
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        # If json_mode is True, we force OpenAI to return valid JSON object
+        "response_format": {"type": "json_object"} if json_mode else {"type": "text"},
+        "temperature": 0.0 if deterministic else 0.7,
+    }
+
+
+def _cacheable(content, json_mode):
+    """Only well-formed answers are cached; a bad one is retried next call."""
+    if not content:
+        return False
+    if json_mode:
+        try:
+            json.loads(content)
+        except json.JSONDecodeError:
+            return False
+    return True
+
+
+def _complete(request, site):
+    started = time.perf_counter()
+    response = openai_client.chat_completion(site, **request)
+    return response.choices[0].message.content, time.perf_counter() - started
+
+
+async def _acomplete(request, site):
+    started = time.perf_counter()
+    response = await openai_client.achat_completion(site, **request)
+    return response.choices[0].message.content, time.perf_counter() - started
+
+
+def query_llm(prompt: str, json_mode: bool = False, cache: bool = True, deterministic: bool = False,
+              site: str = "default") -> str:
     """
     Centralized function to query OpenAI GPT.
     Handles JSON enforcement and error safety.
+
+    Responses are cached by (model, messages, format, temperature); pass
+    cache=False to always hit the API. deterministic=True uses temperature
+    0, for call sites where the same prompt should get the same answer.
+    Identical requests already in flight are coalesced (single_flight).
+    site picks the timeout (see openai_client.TIMEOUTS); timeouts and
+    transient errors are retried, and calls fail fast while the OpenAI
+    circuit breaker is open.
     """
+    request = _request(prompt, json_mode, deterministic)
+    key = llm_cache.make_key(request)
+    if cache:
+        cached = llm_cache.lookup(request)
+        if cached is not None:
+            return cached
+
     try:
-        # 1. Select Model (gpt-4o-mini is best for speed/cost balance)
-        model = "gpt-4o-mini" 
+        content, latency = single_flight.do(key, lambda: _complete(request, site))
 
-        # 2. Define messages
-        messages = [
-            {"role": "system", "content": "You are a helpful AI assistant for a hiring platform."},
-            {"role": "user", "content": prompt}
-        ]
+    except Exception as e:
+        print(f"❌ OpenAI API Error: {str(e)}")
+        # Return empty JSON object on failure if mode is JSON, else error string
+        return "{}" if json_mode else "Error processing request."
 
-        # 3. Call API
-        # If json_mode is True, we force OpenAI to return valid JSON object
-        response = client.chat.completions.create(
-            model=model,
-            messages=messages,
-            response_format={"type": "json_object"} if json_mode else {"type": "text"},
-            temperature=0.7
-        )
+    if cache and _cacheable(content, json_mode):
+        llm_cache.store(request, content, latency)
+    return content
+
+
+async def aquery_llm(prompt: str, json_mode: bool = False, cache: bool = True, deterministic: bool = False,
+                     site: str = "default") -> str:
+    """
+    Async query_llm: awaits the API without holding a thread, so several
+    calls can be in flight at once (see asyncio.gather). Same caching.
+    """
+    request = _request(prompt, json_mode, deterministic)
+    key = llm_cache.make_key(request)
+    # Cache reads/writes are short local calls, done inline
+    if cache:
+        cached = llm_cache.lookup(request)
+        if cached is not None:
+            return cached
 
-        return response.choices[0].message.content
+    try:
+        content, latency = await single_flight.ado(key, lambda: _acomplete(request, site))
 
     except Exception as e:
         print(f"❌ OpenAI API Error: {str(e)}")
-        # Return empty JSON object on failure if mode is JSON, else error string
-        return "{}" if json_mode else "Error processing request."
\ No newline at end of file
+        return "{}" if json_mode else "Error processing request."
+
+    if cache and _cacheable(content, json_mode):
+        llm_cache.store(request, content, latency)
+    return content
+
+
+def cache_stats():
+    return llm_cache.stats()
@@ -0,0 +1,49 @@
+import os
+
+# Fields of /proc/<pid>/smaps_rollup we report, in kB
+ROLLUP_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+def read_memory(pid="self"):
+    """
+    Returns the RSS/PSS breakdown of a process in kB (Linux only).
+
+    PSS splits every shared page evenly between the processes mapping it,
+    so summing PSS across gunicorn workers gives the real footprint that
+    RSS overstates when the model pages are shared copy-on-write.
+    """
+    stats = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name in ROLLUP_FIELDS:
+                    stats[name] = int(value.split()[0])
+    except OSError:
+        return {}
+    return stats
+
+
+def child_pids(parent_pid):
+    """Lists the direct children of a process, e.g. a gunicorn master's workers."""
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name may contain spaces; fields resume after ')'
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == int(parent_pid):
+            children.append(int(entry))
+    return sorted(children)
+
+
+def worker_memory_report(master_pid):
+    """Per-process memory for a gunicorn master and all of its workers."""
+    rows = [{"pid": int(master_pid), "role": "master", **read_memory(master_pid)}]
+    for pid in child_pids(master_pid):
+        rows.append({"pid": pid, "role": "worker", **read_memory(pid)})
+    return rows
@@ -0,0 +1,308 @@
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+
+from django.conf import settings
+
+# One pooled client per process (and one async client per event loop) for
+# every OpenAI call in the app. The SDK's own retries are disabled; calls go
+# through chat_completion / achat_completion, which add per-call-site
+# timeouts, jittered exponential backoff and a process-wide circuit breaker.
+
+# Seconds per call site; the whole request (connect + generation) must fit
+TIMEOUTS = {
+    "default": 30.0,
+    "parse": 45.0,
+    "questions": 30.0,
+    "grading": 20.0,
+    "batch_grading": 60.0,
+    "chat": 20.0,
+    "summary": 30.0,
+}
+CONNECT_TIMEOUT = 5.0
+
+MAX_CONNECTIONS = 50
+MAX_KEEPALIVE = 20
+KEEPALIVE_EXPIRY = 60.0
+
+MAX_RETRIES = 2
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 8.0
+
+BREAKER_WINDOW = 20          # most recent calls considered
+BREAKER_MIN_CALLS = 10
+BREAKER_FAILURE_RATIO = 0.5
+BREAKER_COOLDOWN = 30.0      # seconds open before a trial call is let through
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling OpenAI while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Opens when at least failure_ratio of the last `window` calls failed, then
+    fails fast for `cooldown` seconds. After that a single trial call is
+    allowed (half-open): success closes the circuit, failure re-opens it.
+    """
+
+    def __init__(self, window=BREAKER_WINDOW, min_calls=BREAKER_MIN_CALLS,
+                 failure_ratio=BREAKER_FAILURE_RATIO, cooldown=BREAKER_COOLDOWN):
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._outcomes = []
+        self._opened_at = None
+        self._trial_started = None
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def before_call(self):
+        with self._lock:
+            state = self._state()
+            # A trial that never reported back (e.g. cancelled) expires after a cooldown
+            trial_pending = (
+                self._trial_started is not None
+                and time.monotonic() - self._trial_started < self.cooldown
+            )
+            if state == "open" or (state == "half-open" and trial_pending):
+                raise CircuitOpenError("OpenAI circuit breaker is open")
+            if state == "half-open":
+                self._trial_started = time.monotonic()
+
+    def record(self, success):
+        with self._lock:
+            if self._opened_at is not None:
+                # Outcome of the half-open trial call
+                self._trial_started = None
+                self._opened_at = None if success else time.monotonic()
+                self._outcomes = []
+                return
+
+            self._outcomes.append(success)
+            del self._outcomes[:-self.window]
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_ratio:
+                self._opened_at = time.monotonic()
+                print(f"OpenAI circuit breaker opened ({failures}/{len(self._outcomes)} calls failed)")
+
+    def reset(self):
+        with self._lock:
+            self._outcomes = []
+            self._opened_at = None
+            self._trial_started = None
+
+
+breaker = CircuitBreaker()
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+_async_clients = weakref.WeakKeyDictionary()
+
+
+# httpx types are taken from the SDK, which pins its own httpx flavour
+def _options():
+    import openai
+
+    return {
+        "api_key": settings.OPENAI_API_KEY,
+        "base_url": getattr(settings, "OPENAI_BASE_URL", None),
+        "max_retries": 0,
+        "timeout": openai.Timeout(TIMEOUTS["default"], connect=CONNECT_TIMEOUT),
+    }
+
+
+def _limits():
+    import openai
+
+    return type(openai.DEFAULT_CONNECTION_LIMITS)(
+        max_connections=getattr(settings, "OPENAI_MAX_CONNECTIONS", MAX_CONNECTIONS),
+        max_keepalive_connections=MAX_KEEPALIVE,
+        keepalive_expiry=KEEPALIVE_EXPIRY
+    )
+
+
+def get_client():
+    """The process-wide sync client (rebuilt after fork: sockets can't be shared)."""
+    global _client, _client_pid
+    if _client is None or _client_pid != os.getpid():
+        with _client_lock:
+            if _client is None or _client_pid != os.getpid():
+                from openai import DefaultHttpxClient, OpenAI
+
+                _client = OpenAI(http_client=DefaultHttpxClient(limits=_limits()), **_options())
+                _client_pid = os.getpid()
+    return _client
+
+
+def get_async_client():
+    """Async client for the running event loop (its pool is bound to that loop)."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+        client = _async_clients[loop] = AsyncOpenAI(
+            http_client=DefaultAsyncHttpxClient(limits=_limits()), **_options()
+        )
+    return client
+
+
+async def _closing_loop_client(coro):
+    try:
+        return await coro
+    finally:
+        client = _async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.close()
+
+
+def run(coro):
+    """
+    asyncio.run() for sync callers (task stages). Closes the async client
+    the coroutine created for its short-lived loop, whose sockets would
+    otherwise stay open until garbage collection.
+    """
+    return asyncio.run(_closing_loop_client(coro))
+
+
+def reset_clients():
+    """Drops cached clients, e.g. after changing OPENAI_BASE_URL in tests."""
+    global _client
+    with _client_lock:
+        _client = None
+    _async_clients.clear()
+
+
+def _is_retryable(error):
+    import openai
+
+    return isinstance(error, (
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.RateLimitError,
+        openai.InternalServerError,
+    ))
+
+
+def _backoff(attempt):
+    # "Full jitter": spreads retries of many concurrent callers apart
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+def chat_completion(site="default", **request):
+    """
+    client.chat.completions.create(**request) with the call site's timeout,
+    retries on timeouts / connection errors / 429 / 5xx, and the breaker.
+    Raises the last error (or CircuitOpenError) when the call fails.
+    """
+    timeout = TIMEOUTS.get(site, TIMEOUTS["default"])
+    for attempt in range(MAX_RETRIES + 1):
+        breaker.before_call()
+        try:
+            response = get_client().chat.completions.create(timeout=timeout, **request)
+        except Exception as e:
+            retryable = _is_retryable(e)
+            breaker.record(success=not retryable)
+            if not retryable or attempt == MAX_RETRIES:
+                raise
+            time.sleep(_backoff(attempt))
+        else:
+            breaker.record(success=True)
+            return response
+
+
+async def achat_completion(site="default", **request):
+    """Async chat_completion (same timeouts, retries and breaker)."""
+    timeout = TIMEOUTS.get(site, TIMEOUTS["default"])
+    for attempt in range(MAX_RETRIES + 1):
+        breaker.before_call()
+        try:
+            response = await get_async_client().chat.completions.create(timeout=timeout, **request)
+        except Exception as e:
+            retryable = _is_retryable(e)
+            breaker.record(success=not retryable)
+            if not retryable or attempt == MAX_RETRIES:
+                raise
+            await asyncio.sleep(_backoff(attempt))
+        else:
+            breaker.record(success=True)
+            return response
+
+
+def stream_chat_completion(site="default", **request):
+    """
+    Yields the completion's text deltas as they arrive (stream=True).
+
+    Opening the stream is retried like chat_completion; once the first
+    chunk has been yielded an error is raised to the caller instead, since
+    the text already sent cannot be taken back.
+    """
+    timeout = TIMEOUTS.get(site, TIMEOUTS["default"])
+    for attempt in range(MAX_RETRIES + 1):
+        breaker.before_call()
+        try:
+            stream = get_client().chat.completions.create(stream=True, timeout=timeout, **request)
+            break
+        except Exception as e:
+            retryable = _is_retryable(e)
+            breaker.record(success=not retryable)
+            if not retryable or attempt == MAX_RETRIES:
+                raise
+            time.sleep(_backoff(attempt))
+
+    try:
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    except Exception as e:
+        breaker.record(success=not _is_retryable(e))
+        raise
+    else:
+        breaker.record(success=True)
+    finally:
+        stream.close()
+
+
+async def astream_chat_completion(site="default", **request):
+    """Async stream_chat_completion (same retries while opening, same breaker)."""
+    timeout = TIMEOUTS.get(site, TIMEOUTS["default"])
+    for attempt in range(MAX_RETRIES + 1):
+        breaker.before_call()
+        try:
+            stream = await get_async_client().chat.completions.create(stream=True, timeout=timeout, **request)
+            break
+        except Exception as e:
+            retryable = _is_retryable(e)
+            breaker.record(success=not retryable)
+            if not retryable or attempt == MAX_RETRIES:
+                raise
+            await asyncio.sleep(_backoff(attempt))
+
+    try:
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    except Exception as e:
+        breaker.record(success=not _is_retryable(e))
+        raise
+    else:
+        breaker.record(success=True)
+    finally:
+        await stream.close()
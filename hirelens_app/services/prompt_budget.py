@@ -0,0 +1,119 @@
+import math
+import re
+import threading
+import time
+
+# Token budgets for everything we send to the LLM. Counting uses the
+# model's tokenizer (tiktoken); while it cannot be loaded (its BPE file is
+# downloaded on first use) a conservative characters-per-token estimate is
+# used, so budgets are never exceeded.
+
+MODEL = "gpt-4o-mini"
+
+CHARS_PER_TOKEN = 3.5     # fallback estimate; real English text is ~4
+MESSAGE_OVERHEAD = 4      # role and separators of one chat message
+
+RESUME_PARSE_TOKENS = 2500    # resume text in the structured-parse prompt
+CHAT_INPUT_TOKENS = 3500      # whole request of one interview chat turn
+CHAT_RESUME_TOKENS = 1200     # resume share of the interview system prompt
+CHAT_JOB_TOKENS = 300         # job requirements share of the system prompt
+CHAT_SUMMARY_TOKENS = 300     # rolling summary of older interview turns
+ANSWER_TOKENS = 800           # candidate answer sent for grading
+
+ENCODING_RETRY_SECONDS = 60   # wait before loading a failed tokenizer again
+
+_SENTENCE = re.compile(r"[^.!?\n]*(?:[.!?]+[\"')\]]*\s*|\n+|$)")
+
+_encodings = {}
+_encoding_failed_at = {}
+_encodings_lock = threading.Lock()
+
+
+def _encoding(model):
+    """
+    tiktoken encoding for the model, or None while it is unavailable.
+    A failed load (e.g. no network for the BPE download) is retried after
+    ENCODING_RETRY_SECONDS; meanwhile, and while another thread is loading
+    it, callers get None and estimate instead of waiting.
+    """
+    encoding = _encodings.get(model)
+    if encoding is not None:
+        return encoding
+    failed_at = _encoding_failed_at.get(model)
+    if failed_at is not None and time.monotonic() - failed_at < ENCODING_RETRY_SECONDS:
+        return None
+    if not _encodings_lock.acquire(blocking=False):
+        return None
+    try:
+        if model not in _encodings:
+            try:
+                import tiktoken
+                try:
+                    _encodings[model] = tiktoken.encoding_for_model(model)
+                except KeyError:
+                    _encodings[model] = tiktoken.get_encoding("o200k_base")
+                _encoding_failed_at.pop(model, None)
+            except Exception as e:
+                print(f"Tokenizer unavailable, estimating token counts: {e}")
+                _encoding_failed_at[model] = time.monotonic()
+        return _encodings.get(model)
+    finally:
+        _encodings_lock.release()
+
+
+def count_tokens(text, model=MODEL):
+    if not text:
+        return 0
+    encoding = _encoding(model)
+    if encoding is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(messages, model=MODEL):
+    return sum(count_tokens(m["content"], model) + MESSAGE_OVERHEAD for m in messages)
+
+
+def _cut(text, max_tokens, model):
+    encoding = _encoding(model)
+    if encoding is None:
+        return text[:int(max_tokens * CHARS_PER_TOKEN)]
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+
+
+def trim_to_tokens(text, max_tokens, model=MODEL):
+    """
+    Longest prefix of whole sentences (or lines) that fits max_tokens.
+    Only if the first sentence alone is too long is it cut mid-sentence.
+    """
+    if max_tokens <= 0 or not text:
+        return ""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+
+    kept, used = [], 0
+    for sentence in _SENTENCE.findall(text):
+        if not sentence:
+            continue
+        cost = count_tokens(sentence, model)
+        if used + cost > max_tokens:
+            break
+        kept.append(sentence)
+        used += cost
+
+    if not kept:
+        return _cut(text, max_tokens, model)
+    return "".join(kept).rstrip()
+
+
+def fit_history(messages, max_tokens, model=MODEL):
+    """Most recent chat messages (in order) whose total fits max_tokens."""
+    kept, used = [], 0
+    for message in reversed(messages):
+        cost = count_tokens(message["content"], model) + MESSAGE_OVERHEAD
+        if used + cost > max_tokens:
+            break
+        kept.append(message)
+        used += cost
+    kept.reverse()
+    return kept
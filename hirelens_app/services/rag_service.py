@@ -1,24 +1,36 @@
 # hirelens_app/services/rag_service.py
 
-import os
-from openai import OpenAI
-from django.conf import settings
+from . import chat_memory, openai_client, session_state, single_flight
+from .llm_cache import make_key
+from .resume_chunks import retrieve
+from .prompt_budget import (
+    CHAT_INPUT_TOKENS, CHAT_JOB_TOKENS, CHAT_RESUME_TOKENS,
+    count_message_tokens, fit_history, trim_to_tokens,
+)
 
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
+CHAT_FALLBACK = "I'm having trouble connecting to the server. Let's continue with the next topic."
 
-def build_rag_context(resume_text, job_description):
+def build_rag_context(resume_text, job_description, retrieval=False):
     """
     RAG Context with a strict 4-phase interview structure.
     Updated to focus Technical Questions on the MATCHING skills between Resume and Job.
+
+    With retrieval=True the resume is left out: each turn instead carries
+    the resume chunks relevant to it (see resume_chunks).
     """
+    if retrieval:
+        resume_content = "(Relevant excerpts are provided with every turn under RESUME EXCERPTS.)"
+    else:
+        resume_content = trim_to_tokens(resume_text, CHAT_RESUME_TOKENS)
+
     system_prompt = f"""
     You are 'HireLens', an intelligent and adaptive AI Technical Interviewer.
     
     INTERNAL DATA (CONTEXT):
     ------------------------
-    RESUME CONTENT: {resume_text[:4000]}
+    RESUME CONTENT: {resume_content}
     ------------------------
-    JOB REQUIREMENTS: {job_description}
+    JOB REQUIREMENTS: {trim_to_tokens(job_description, CHAT_JOB_TOKENS)}
     ------------------------
     
     YOUR GOAL:
@@ -49,37 +61,118 @@ def build_rag_context(resume_text, job_description):
     """
     return system_prompt
 
+# What the resume is searched for while preparing the AI's n-th message,
+# following the interview structure above (1-2 technical, 3 icebreaker,
+# 4-5 projects, then the conclusion)
+PHASE_QUERIES = [
+    (2, "Technical skills, programming languages, frameworks and tools used at work"),
+    (3, "Hobbies, interests and personal achievements"),
+    (5, "Projects built: goals, architecture, technologies used and technical challenges"),
+    (None, "Professional summary, experience and education"),
+]
+
+
+def _phase_query(state):
+    next_message = state.ai_messages + 1
+    for last_message, query in PHASE_QUERIES:
+        if last_message is None or next_message <= last_message:
+            return query
+
+
+def _resume_excerpts(state, history, user_message):
+    """Resume chunks relevant to the current phase and the latest candidate message."""
+    latest = user_message or next(
+        (m["content"] for m in reversed(history) if m["role"] == "user"), ""
+    )
+    chunks = retrieve(state.chunks, f"{_phase_query(state)}\n{latest}")
+    if not chunks:
+        return None
+    excerpts = "\n".join(f"[{i}] {chunk}" for i, chunk in enumerate(chunks, 1))
+    return {"role": "system", "content": f"RESUME EXCERPTS (most relevant to this turn):\n{excerpts}"}
+
+
+def _build_messages(state, user_message=None):
+    """
+    System prompt + resume excerpts for this turn + rolling summary of
+    older turns + the recent turns that fit the token budget + new message,
+    all from the session's hot state (see session_state).
+    """
+    summary, history = chat_memory.recent_history(state)
+
+    system = [{"role": "system", "content": state.system_context}]
+    excerpts = _resume_excerpts(state, history, user_message)
+    if excerpts:
+        system.append(excerpts)
+    if summary:
+        system.append({"role": "system", "content": f"INTERVIEW SO FAR (summary of earlier turns):\n{summary}"})
+    current = [{"role": "user", "content": user_message}] if user_message else []
+
+    history_budget = CHAT_INPUT_TOKENS - count_message_tokens(system + current)
+    return system + fit_history(history, history_budget) + current
+
+
+def _chat_request(messages):
+    return {
+        "model": "gpt-4o-mini",
+        "messages": messages,
+        "temperature": 0.7,
+        "max_tokens": 250,
+    }
+
+
 def get_ai_response(session_id, user_message=None):
     """
     RAG Logic: Retrieves history + Context -> Generates Response
     """
-    from hirelens_app.models import InterviewSession, ChatMessage
-    
-    session = InterviewSession.objects.get(id=session_id)
+    state = session_state.load(session_id)
     
-    # 1. Build Message History (Context Window)
-    messages = [{"role": "system", "content": session.system_context}]
-    
-    # Fetch recent chat history
-    recent_chats = ChatMessage.objects.filter(session=session).order_by('timestamp')
-    for chat in recent_chats:
-        role = "assistant" if chat.sender == 'ai' else "user"
-        messages.append({"role": role, "content": chat.message_text})
-    
-    # 2. Add current user message
-    if user_message:
-        messages.append({"role": "user", "content": user_message})
+    # 1. Build Message History (Context Window) + current user message
+    request = _chat_request(_build_messages(state, user_message))
 
-    # 3. Call OpenAI
+    # 2. Call OpenAI (a double-submitted message shares one in-flight call)
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=messages,
-            temperature=0.7, 
-            max_tokens=250
+        ai_text = single_flight.do(
+            make_key(request),
+            lambda: openai_client.chat_completion("chat", **request).choices[0].message.content
         )
-        ai_text = response.choices[0].message.content
         return ai_text
     except Exception as e:
         print(f"OpenAI Error: {e}")
-        return "I'm having trouble connecting to the server. Let's continue with the next topic."
\ No newline at end of file
+        return CHAT_FALLBACK
+
+
+def stream_ai_response(session_id, user_message=None):
+    """
+    Same as get_ai_response, but yields the reply in pieces as the model
+    generates it. Persisting the finished reply is up to the caller.
+    """
+    state = session_state.load(session_id)
+    request = _chat_request(_build_messages(state, user_message))
+    yield from openai_client.stream_chat_completion("chat", **request)
+
+
+# Async variants for the ASGI chat endpoints: the OpenAI call is awaited on
+# the event loop, so a waiting interview holds no thread. Building the
+# messages (a query embedding, maybe queueing a fold) runs in a pool
+# thread (session_state.off_thread), not in the shared thread-sensitive one.
+
+async def aget_ai_response(session_id, user_message=None):
+    state = await session_state.aload(session_id)
+    request = _chat_request(await session_state.off_thread(_build_messages)(state, user_message))
+
+    async def complete():
+        response = await openai_client.achat_completion("chat", **request)
+        return response.choices[0].message.content
+
+    try:
+        return await single_flight.ado(make_key(request), complete)
+    except Exception as e:
+        print(f"OpenAI Error: {e}")
+        return CHAT_FALLBACK
+
+
+async def astream_ai_response(session_id, user_message=None):
+    state = await session_state.aload(session_id)
+    request = _chat_request(await session_state.off_thread(_build_messages)(state, user_message))
+    async for delta in openai_client.astream_chat_completion("chat", **request):
+        yield delta
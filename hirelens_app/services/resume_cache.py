@@ -0,0 +1,72 @@
+import hashlib
+import json
+
+from django.db import IntegrityError
+
+from .resume_parser import extract_pdf_text, parse_failed, parse_resume_text
+
+
+def file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def get_resume_entry(file_path):
+    """
+    Returns the cache row for this file's bytes, extracting text on a miss.
+    An unreadable file gives an unsaved row with empty text.
+    """
+    from hirelens_app.models import ResumeParseCache
+
+    try:
+        sha = file_sha256(file_path)
+    except OSError as e:
+        print(f"File Read Error: {e}")
+        return ResumeParseCache(sha256="", extracted_text="")
+    entry = ResumeParseCache.objects.filter(sha256=sha).first()
+    if entry is not None:
+        return entry
+
+    text, complete = extract_pdf_text(file_path)
+    if not complete or not text.strip():
+        # Failed, timed-out or partial extraction: don't pin it forever
+        return ResumeParseCache(sha256=sha, extracted_text=text)
+    try:
+        return ResumeParseCache.objects.create(sha256=sha, extracted_text=text)
+    except IntegrityError:
+        # Another worker cached the same file first
+        return ResumeParseCache.objects.get(sha256=sha)
+
+
+def get_resume_text(file_path):
+    """Extracted resume text; each distinct file is only ever extracted once."""
+    return get_resume_entry(file_path).extracted_text
+
+
+def cached_parse(entry):
+    """The stored LLM parse of a cache row, or None if it was never parsed."""
+    return json.loads(entry.parsed_json) if entry.parsed_json else None
+
+
+def store_parse(entry, parsed_data):
+    """Saves a parse unless it failed (failed parses are retried next time)."""
+    if entry.pk and not parse_failed(parsed_data):
+        entry.parsed_json = json.dumps(parsed_data)
+        entry.save(update_fields=["parsed_json"])
+
+
+def get_parsed_resume(file_path):
+    """
+    Returns (extracted_text, parsed_data) for a resume file.
+
+    Both the PDF extraction and the LLM parse are cached by content hash.
+    """
+    entry = get_resume_entry(file_path)
+    parsed_data = cached_parse(entry)
+    if parsed_data is None:
+        parsed_data = parse_resume_text(entry.extracted_text)
+        store_parse(entry, parsed_data)
+    return entry.extracted_text, parsed_data
@@ -0,0 +1,69 @@
+import numpy as np
+
+from .embedding import get_embeddings, split_windows
+
+# Retrieval over one interview's resume. The resume is split into small
+# overlapping token windows and embedded once when the session starts
+# (InterviewChunk rows, float16); each chat turn then sends only the TOP_K
+# chunks closest to that turn's query instead of the whole resume.
+
+CHUNK_TOKENS = 128
+CHUNK_STRIDE = 32
+TOP_K = 3
+
+
+def index_session(session, resume_text):
+    """Chunks and embeds the session's resume; returns the number of chunks (0 on failure)."""
+    from hirelens_app.models import InterviewChunk
+
+    if not resume_text or not resume_text.strip():
+        return 0
+    try:
+        chunks = split_windows(resume_text, max_length=CHUNK_TOKENS, stride=CHUNK_STRIDE)
+        vectors = get_embeddings(chunks, batch_size=len(chunks), max_length=CHUNK_TOKENS)
+    except Exception as e:
+        print(f"Resume Chunk Error: {e}")
+        return 0
+
+    InterviewChunk.objects.bulk_create([
+        InterviewChunk(
+            session=session,
+            position=i,
+            text=chunk,
+            embedding=vector.astype(np.float16).tobytes()
+        )
+        for i, (chunk, vector) in enumerate(zip(chunks, vectors))
+    ])
+    return len(chunks)
+
+
+def load_chunks(session_id):
+    """[(text, float16 vector bytes)] of the session, in resume order."""
+    from hirelens_app.models import InterviewChunk
+
+    return [
+        (text, bytes(vector))
+        for text, vector in InterviewChunk.objects.filter(session_id=session_id)
+        .order_by("position")
+        .values_list("text", "embedding")
+    ]
+
+
+def retrieve(chunks, query, top_k=TOP_K):
+    """
+    The top_k of the session's chunks (see load_chunks) most similar to
+    query, in resume order. The first chunks if embedding fails.
+    """
+    if len(chunks) <= top_k:
+        return [text for text, _ in chunks]
+
+    try:
+        query_vector = get_embeddings([query], max_length=CHUNK_TOKENS)[0]
+    except Exception as e:
+        print(f"Resume Chunk Error: {e}")
+        return [text for text, _ in chunks[:top_k]]
+
+    matrix = np.frombuffer(b"".join(vector for _, vector in chunks), dtype=np.float16).reshape(len(chunks), -1)
+    scores = matrix.astype(np.float32) @ query_vector
+    best = np.argpartition(-scores, top_k - 1)[:top_k]
+    return [chunks[i][0] for i in sorted(best)]
@@ -1,26 +1,163 @@
 import json
+import os
+import time
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
 import PyPDF2
-from .llm_engine import query_llm
+from .llm_engine import aquery_llm, query_llm
+from .prompt_budget import RESUME_PARSE_TOKENS, trim_to_tokens
 
-def extract_text_from_file(file_path):
-    """Simple text extractor for PDFs"""
-    text = ""
-    try:
-        if file_path.lower().endswith('.pdf'):
-            with open(file_path, 'rb') as f:
-                reader = PyPDF2.PdfReader(f)
-                for page in reader.pages:
-                    text += page.extract_text() + "\n"
+PARSE_FAILED_SUMMARY = "Could not parse resume."
+
+MAX_RESUME_CHARS = 30000  # extraction safety cap; the LLM sees RESUME_PARSE_TOKENS of it
+CHUNK_PAGES = 4           # pages per extraction task
+EXTRACT_WORKERS = 2       # processes extracting chunks of one large PDF
+EXTRACT_TIMEOUT = 20      # seconds per file before the extractor is killed
+
+def _page_texts(reader, start=0, stop=None):
+    for page in reader.pages[start:stop]:
+        yield (page.extract_text() or "") + "\n"
+
+def _extract_pages(file_path, start, stop, max_chars):
+    """
+    Pool task: extracts pages [start, stop) until max_chars is reached.
+    Returns (page texts, total page count).
+    """
+    parts, size = [], 0
+    with open(file_path, 'rb') as f:
+        reader = PyPDF2.PdfReader(f)
+        for text in _page_texts(reader, start, stop):
+            parts.append(text)
+            size += len(text)
+            if size >= max_chars:
+                break
+        return parts, len(reader.pages)
+
+# One pool per worker process, shared by its threads (request threads,
+# run_workers threads, bulk ingestion); a forked gunicorn worker must not
+# reuse its parent's pool. forkserver children do not inherit torch/OpenMP
+# state. Each extraction holds a lease on the pool. A timeout or a crashed
+# child retires the pool: new extractions get a fresh one, and the old one
+# is terminated only once the extractions still using it are done.
+class _PoolLease:
+    def __init__(self):
+        self.pool = ProcessPoolExecutor(
+            max_workers=EXTRACT_WORKERS,
+            mp_context=multiprocessing.get_context("forkserver")
+        )
+        self.pid = os.getpid()
+        self.users = 0
+        self.retired = False
+
+_lease = None
+_pool_lock = threading.Lock()
+
+def _acquire():
+    global _lease
+    with _pool_lock:
+        if _lease is None or _lease.retired or _lease.pid != os.getpid():
+            _lease = _PoolLease()
+        _lease.users += 1
+        return _lease
+
+def _release(lease):
+    with _pool_lock:
+        lease.users -= 1
+        done = lease.retired and lease.users == 0
+    if done:
+        _terminate(lease.pool)
+
+def _retire(lease):
+    """Hands out no more work to a stuck or broken pool"""
+    global _lease
+    with _pool_lock:
+        lease.retired = True
+        if _lease is lease:
+            _lease = None
+
+def _terminate(pool):
+    # ProcessPoolExecutor cannot cancel running tasks, so stop its processes
+    for process in list((getattr(pool, "_processes", None) or {}).values()):
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def extract_pdf_text(file_path, max_chars=MAX_RESUME_CHARS, timeout=EXTRACT_TIMEOUT):
+    """
+    Streaming text extractor. Returns (text, complete); complete is False
+    when extraction failed or timed out part-way, so callers can avoid
+    caching a truncated result.
+
+    Pages are extracted lazily and extraction stops as soon as max_chars
+    is reached, so a 40-page portfolio costs only the pages that fit.
+    The first chunk of pages also reports the page count; if more text is
+    needed the following chunks are extracted in parallel. Everything runs
+    in a process pool under a per-file timeout.
+    """
+    parts = []
+    if not file_path.lower().endswith('.pdf'):
         # Add Image logic here if needed (using pytesseract)
+        return "", True
+
+    lease = _acquire()
+    try:
+        pool = lease.pool
+        deadline = time.monotonic() + timeout
+        remaining = lambda: max(deadline - time.monotonic(), 0)
+
+        first, total = pool.submit(
+            _extract_pages, file_path, 0, CHUNK_PAGES, max_chars
+        ).result(timeout=remaining())
+        parts.extend(first)
+        size = sum(map(len, parts))
+
+        # Remaining chunks: keep EXTRACT_WORKERS in flight, consume in
+        # page order and stop submitting once the budget is met
+        starts = iter(range(CHUNK_PAGES, total, CHUNK_PAGES))
+        in_flight = deque()
+        while size < max_chars:
+            while len(in_flight) < EXTRACT_WORKERS:
+                start = next(starts, None)
+                if start is None:
+                    break
+                in_flight.append(pool.submit(
+                    _extract_pages, file_path, start, start + CHUNK_PAGES, max_chars - size
+                ))
+            if not in_flight:
+                break
+            chunk, _ = in_flight.popleft().result(timeout=remaining())
+            parts.extend(chunk)
+            size += sum(map(len, chunk))
+        for pending in in_flight:
+            pending.cancel()
+        complete = True
+    except FutureTimeout:
+        print(f"File Read Error: extraction timed out after {timeout}s ({file_path})")
+        _retire(lease)
+        complete = False
+    except BrokenProcessPool as e:
+        print(f"File Read Error: extractor process died ({file_path}): {e}")
+        _retire(lease)
+        complete = False
     except Exception as e:
         print(f"File Read Error: {e}")
-    return text[:8000]  # Truncate to fit context window
+        complete = False
+    finally:
+        _release(lease)
+    return "".join(parts)[:max_chars], complete
+
+def extract_text_from_file(file_path, max_chars=MAX_RESUME_CHARS, timeout=EXTRACT_TIMEOUT):
+    """Extracted text (possibly partial if extraction failed part-way)"""
+    return extract_pdf_text(file_path, max_chars, timeout)[0]
 
 def parse_resume_smart(file_path):
     """Uses AI to turn raw resume text into structured JSON"""
-    raw_text = extract_text_from_file(file_path)
-    
-    prompt = f"""
+    return parse_resume_text(extract_text_from_file(file_path))
+
+def _parse_prompt(raw_text):
+    return f"""
     Analyze this resume text and output a JSON object with these exact keys:
     {{
         "candidate_name": "String",
@@ -32,11 +169,28 @@ def parse_resume_smart(file_path):
     }}
     
     RESUME TEXT:
-    {raw_text}
+    {trim_to_tokens(raw_text, RESUME_PARSE_TOKENS)}
     """
-    
-    response = query_llm(prompt, json_mode=True)
+
+def _load_parse(response):
     try:
         return json.loads(response)
     except json.JSONDecodeError:
-        return {"skills": [], "summary": "Could not parse resume.", "experience_years": 0}
\ No newline at end of file
+        return {"skills": [], "summary": PARSE_FAILED_SUMMARY, "experience_years": 0}
+
+def parse_failed(parsed_data):
+    """
+    True for a parse with nothing usable: invalid JSON, or the "{}" that
+    query_llm returns when the API call failed.
+    """
+    if not isinstance(parsed_data, dict) or parsed_data.get("summary") == PARSE_FAILED_SUMMARY:
+        return True
+    return not parsed_data.get("skills") and not str(parsed_data.get("summary") or "").strip()
+
+def parse_resume_text(raw_text):
+    """Same as parse_resume_smart, for text that has already been extracted"""
+    return _load_parse(query_llm(_parse_prompt(raw_text), json_mode=True, deterministic=True, site="parse"))
+
+async def aparse_resume_text(raw_text):
+    """Async parse_resume_text (same prompt, non-blocking LLM call)"""
+    return _load_parse(await aquery_llm(_parse_prompt(raw_text), json_mode=True, deterministic=True, site="parse"))
@@ -0,0 +1,141 @@
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.db import connection
+
+from . import chat_memory, resume_chunks
+
+# Hot state of live interview sessions, so that a chat turn reads nothing
+# from the database: the system context, the rolling summary, the window of
+# not yet summarized messages, the AI message count (interview phase) and
+# the resume chunks. Built from the DB on a miss. New messages are written
+# to the DB first and then appended here (write-through). The state is
+# dropped when a fold rewrites the summary or the session row is saved
+# (e.g. marked completed); the next turn rebuilds it.
+#
+# The "sessions" alias (see CACHES in settings) is file based so every
+# worker sees the same state; a single-process server can use locmem.
+
+CACHE_ALIAS = "sessions"
+WINDOW = chat_memory.RECENT_MESSAGES + chat_memory.FOLD_BATCH
+
+
+class SessionState:
+    def __init__(self, session, window, ai_messages, chunks):
+        self.id = session.id
+        self.system_context = session.system_context
+        self.summary = session.summary
+        self.summarized_through = session.summarized_through
+        self.is_completed = session.is_completed
+        self.window = window            # [(sender, text)], oldest first
+        self.ai_messages = ai_messages
+        self.chunks = chunks            # [(text, float16 bytes)]
+        self.fold_scheduled = False
+
+
+def _key(session_id):
+    return f"session:{session_id}"
+
+
+def _cached(session_id):
+    try:
+        return caches[CACHE_ALIAS].get(_key(session_id))
+    except Exception as e:
+        print(f"Session Cache Error: {e}")
+        return None
+
+
+def save(state):
+    try:
+        caches[CACHE_ALIAS].set(_key(state.id), state)
+    except Exception as e:
+        print(f"Session Cache Error: {e}")
+
+
+def invalidate(session_id):
+    try:
+        caches[CACHE_ALIAS].delete(_key(session_id))
+    except Exception as e:
+        print(f"Session Cache Error: {e}")
+
+
+def _build(session_id):
+    from hirelens_app.models import ChatMessage, InterviewSession
+
+    session = InterviewSession.objects.only(
+        "id", "system_context", "summary", "summarized_through", "is_completed"
+    ).get(id=session_id)
+    return SessionState(
+        session,
+        window=chat_memory.window_rows(session.id, session.summarized_through, WINDOW),
+        ai_messages=ChatMessage.objects.filter(session_id=session.id, sender='ai').count(),
+        chunks=resume_chunks.load_chunks(session.id)
+    )
+
+
+def load(session_id):
+    """The session's state, from the cache or (on a miss) the database."""
+    state = _cached(session_id)
+    if state is None:
+        state = _build(session_id)
+        save(state)
+    return state
+
+
+def _remember(session_id, sender, text):
+    state = _cached(session_id)
+    if state is None:
+        return  # rebuilt from the DB on the next load
+    state.window.append((sender, text))
+    del state.window[:-WINDOW]
+    if sender == 'ai':
+        state.ai_messages += 1
+    save(state)
+
+
+def append(session_id, sender, text):
+    """Saves a new ChatMessage, then adds it to the cached window."""
+    from hirelens_app.models import ChatMessage
+
+    message = ChatMessage.objects.create(session_id=session_id, sender=sender, message_text=text)
+    _remember(session_id, sender, text)
+    return message
+
+
+def _closing(func):
+    def run(*args):
+        try:
+            return func(*args)
+        finally:
+            # Executor threads open their own DB connections
+            connection.close()
+    return run
+
+
+def off_thread(func):
+    """
+    Awaitable version of func for the async chat views. Runs in the
+    default executor (thread_sensitive=False) instead of the single
+    thread shared by all thread-sensitive code, so one slow load or query
+    embedding does not stall every other chat turn of the worker.
+    """
+    return sync_to_async(_closing(func), thread_sensitive=False)
+
+
+async def aload(session_id):
+    return await off_thread(load)(session_id)
+
+
+async def aappend(session_id, sender, text):
+    from hirelens_app.models import ChatMessage
+
+    message = await ChatMessage.objects.acreate(session_id=session_id, sender=sender, message_text=text)
+    await off_thread(_remember)(session_id, sender, text)
+    return message
+
+
+def complete(session_id):
+    """Marks the interview completed and drops its cached state."""
+    from hirelens_app.models import InterviewSession
+
+    InterviewSession.objects.filter(id=session_id).update(is_completed=True)
+    invalidate(session_id)
@@ -1,7 +1,57 @@
-from sklearn.metrics.pairwise import cosine_similarity
-from .embedding import get_embedding
+import numpy as np
+from .embedding import get_embeddings, split_windows
 
-def resume_similarity(resume_text, requirements_text):
-    resume_emb = get_embedding(resume_text)
-    req_emb = get_embedding(requirements_text)
-    return float(cosine_similarity(resume_emb, req_emb)[0][0])
+POOLING_MODES = ("max", "mean", "attention")
+DEFAULT_POOLING = "attention"
+ATTENTION_TEMPERATURE = 0.1
+
+
+def _pool_scores(resume_windows, req_windows, pooling):
+    """
+    Combines window-level embeddings of two documents into one score.
+
+    max:       best-matching pair of windows.
+    mean:      cosine of the (re-normalized) mean window vectors.
+    attention: each resume window's best match against the requirements,
+               averaged with softmax weights so the most relevant parts of
+               a long resume dominate without ignoring the rest.
+    """
+    if pooling == "mean":
+        a = resume_windows.mean(axis=0)
+        b = req_windows.mean(axis=0)
+        return float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+    # Rows are L2-normalized, so this is the window x window cosine matrix
+    sims = resume_windows @ req_windows.T
+    if pooling == "max":
+        return float(sims.max())
+
+    best = sims.max(axis=1)
+    weights = np.exp((best - best.max()) / ATTENTION_TEMPERATURE)
+    return float((weights * best).sum() / weights.sum())
+
+
+def resume_similarity(resume_text, requirements_text, chunked: bool = True,
+                      pooling: str = DEFAULT_POOLING):
+    """
+    Semantic similarity between a resume and the job requirements.
+
+    With chunked=True both documents are split into overlapping token
+    windows so nothing past the model's max_length is dropped; all windows
+    are embedded together in one batch and pooled with `pooling`.
+    """
+    if not chunked:
+        # Embeddings are L2-normalized, so the dot product is the cosine similarity
+        resume_emb, req_emb = get_embeddings([resume_text, requirements_text])
+        return float(resume_emb @ req_emb)
+
+    if pooling not in POOLING_MODES:
+        raise ValueError(f"Unknown pooling {pooling!r}; choose one of {POOLING_MODES}")
+
+    resume_windows = split_windows(resume_text)
+    req_windows = split_windows(requirements_text)
+    windows = resume_windows + req_windows
+
+    embeddings = get_embeddings(windows, batch_size=len(windows))
+    split = len(resume_windows)
+    return _pool_scores(embeddings[:split], embeddings[split:], pooling)
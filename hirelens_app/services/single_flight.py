@@ -0,0 +1,207 @@
+import asyncio
+import fcntl
+import os
+import tempfile
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+
+# Concurrent identical requests (same key) run once and share the result.
+#
+# In-process: the first caller becomes the leader, later callers wait on its
+# Event. Across processes (gunicorn workers, run_workers): the leader holds
+# an flock on a per-key lock file and publishes its result in the shared
+# "llm" cache; a process blocked on the same lock picks that result up
+# instead of calling again. Only results finished after a caller started
+# waiting are shared, so this coalesces in-flight calls and is not a cache.
+
+CACHE_ALIAS = "llm"
+RESULT_TTL = 60        # seconds a published result stays visible to other processes
+LOCK_WAIT = 120        # give up coalescing (and just call) after this long
+POLL_INTERVAL = 0.05
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+_counters = {"leaders": 0, "followers": 0, "shared": 0}
+
+
+def _count(name):
+    with _flights_lock:
+        _counters[name] += 1
+
+
+def stats():
+    """leaders: calls made; followers: waited in-process; shared: taken from another process."""
+    with _flights_lock:
+        return dict(_counters)
+
+
+def _lock_path(key):
+    directory = Path(getattr(settings, "SINGLE_FLIGHT_LOCK_DIR", None) or Path(tempfile.gettempdir()) / "hirelens_single_flight")
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory / f"{key.replace(':', '_')}.lock"
+
+
+def _try_lock(path):
+    """Opens and flocks the lock file; None if another process holds it."""
+    f = open(path, "a")
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        f.close()
+        return None
+    # The previous holder may have unlinked the file after we opened it
+    try:
+        same_file = os.stat(path).st_ino == os.fstat(f.fileno()).st_ino
+    except FileNotFoundError:
+        same_file = False
+    if not same_file:
+        f.close()
+        return None
+    return f
+
+
+def _unlock(path, f):
+    try:
+        os.unlink(path)  # keeps the lock directory from growing without bound
+    except FileNotFoundError:
+        pass
+    fcntl.flock(f, fcntl.LOCK_UN)
+    f.close()
+
+
+def _published(key, since):
+    try:
+        entry = caches[CACHE_ALIAS].get(f"sf:{key}")
+    except Exception as e:
+        print(f"Single Flight Error: {e}")
+        return None
+    if entry is not None and entry["finished"] >= since:
+        return entry
+    return None
+
+
+def _publish(key, value):
+    try:
+        caches[CACHE_ALIAS].set(f"sf:{key}", {"value": value, "finished": time.time()}, RESULT_TTL)
+    except Exception as e:
+        print(f"Single Flight Error: {e}")
+
+
+@contextmanager
+def _process_lock(key):
+    """Yields a published result (or None once this process holds the key's lock)."""
+    path = _lock_path(key)
+    since = time.time()
+    deadline = time.monotonic() + LOCK_WAIT
+    f = _try_lock(path)
+    while f is None and time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        f = _try_lock(path)
+    try:
+        yield _published(key, since) if f is not None else None
+    finally:
+        if f is not None:
+            _unlock(path, f)
+
+
+@asynccontextmanager
+async def _aprocess_lock(key):
+    path = _lock_path(key)
+    since = time.time()
+    deadline = time.monotonic() + LOCK_WAIT
+    f = _try_lock(path)
+    while f is None and time.monotonic() < deadline:
+        await asyncio.sleep(POLL_INTERVAL)
+        f = _try_lock(path)
+    try:
+        yield _published(key, since) if f is not None else None
+    finally:
+        if f is not None:
+            _unlock(path, f)
+
+
+def _join(key):
+    """Returns (flight, is_leader)."""
+    with _flights_lock:
+        flight = _flights.get(key)
+        if flight is not None:
+            _counters["followers"] += 1
+            return flight, False
+        flight = _flights[key] = _Flight()
+        return flight, True
+
+
+def _land(key, flight, value=None, error=None):
+    flight.value, flight.error = value, error
+    with _flights_lock:
+        _flights.pop(key, None)
+    flight.done.set()
+
+
+def _follow(flight):
+    if flight.error is not None:
+        raise flight.error
+    return flight.value
+
+
+def do(key, fn):
+    """
+    Returns fn(), running it only once for all concurrent callers of key.
+    An exception raised by the leader is raised in every waiting caller.
+    """
+    flight, leader = _join(key)
+    if not leader:
+        flight.done.wait()
+        return _follow(flight)
+
+    try:
+        with _process_lock(key) as shared:
+            if shared is not None:
+                _count("shared")
+                value = shared["value"]
+            else:
+                _count("leaders")
+                value = fn()
+                _publish(key, value)
+    except BaseException as e:
+        _land(key, flight, error=e)
+        raise
+    _land(key, flight, value=value)
+    return value
+
+
+async def ado(key, coro_fn):
+    """Async do(): coro_fn() is awaited once for all concurrent callers of key."""
+    flight, leader = _join(key)
+    if not leader:
+        # The leader may live on another thread's loop, so wait off-loop
+        await asyncio.to_thread(flight.done.wait)
+        return _follow(flight)
+
+    try:
+        async with _aprocess_lock(key) as shared:
+            if shared is not None:
+                _count("shared")
+                value = shared["value"]
+            else:
+                _count("leaders")
+                value = await coro_fn()
+                _publish(key, value)
+    except BaseException as e:
+        _land(key, flight, error=e)
+        raise
+    _land(key, flight, value=value)
+    return value
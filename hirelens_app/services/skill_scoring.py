@@ -0,0 +1,69 @@
+import numpy as np
+from .embedding import get_embeddings
+
+SKILL_THRESHOLD = 0.5
+MAX_EVIDENCE = 3
+
+
+def rank_evidence(skill_embeddings, sentence_embeddings, top_k: int = MAX_EVIDENCE):
+    """
+    Scores every skill against every sentence with a single matmul.
+
+    Both inputs must be L2-normalized row matrices, so the dot product is
+    the cosine similarity. Returns (best_scores, top_idx, top_scores) where
+    the top_k sentence indices per skill are sorted by descending score.
+    """
+    sims = skill_embeddings @ sentence_embeddings.T
+    n_skills, n_sentences = sims.shape
+
+    if n_sentences == 0:
+        empty = np.zeros((n_skills, 0), dtype=np.intp)
+        return np.zeros(n_skills, dtype=np.float32), empty, empty.astype(np.float32)
+
+    k = min(top_k, n_sentences)
+    top_idx = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(sims, top_idx, axis=1)
+
+    order = np.argsort(-top_scores, axis=1, kind="stable")
+    top_idx = np.take_along_axis(top_idx, order, axis=1)
+    top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+    return top_scores[:, 0], top_idx, top_scores
+
+
+def score_skills(resume_text, skill_set, threshold: float = SKILL_THRESHOLD):
+    """
+    Shared engine behind skill_engine.match_skills and
+    skill_matcher.detect_skills.
+
+    skill_set maps a skill name to its list of keywords. Returns
+    {skill: {"present", "score", "evidence"}} with up to MAX_EVIDENCE
+    sentences scoring at or above the threshold, best first.
+    """
+    from nltk.tokenize import sent_tokenize
+
+    sentences = sent_tokenize(resume_text)
+    skills = list(skill_set.items())
+
+    sentence_embeddings = get_embeddings(sentences)
+    skill_embeddings = get_embeddings([" ".join(keywords) for _, keywords in skills])
+
+    best, top_idx, top_scores = rank_evidence(skill_embeddings, sentence_embeddings)
+
+    results = {}
+    for i, (skill, keywords) in enumerate(skills):
+        keyword_found = any(k in resume_text for k in keywords)
+
+        evidence = [
+            sentences[j]
+            for j, s in zip(top_idx[i], top_scores[i])
+            if s >= threshold
+        ]
+
+        results[skill] = {
+            "present": keyword_found or bool(evidence),
+            "score": float(best[i]),
+            "evidence": evidence
+        }
+
+    return results
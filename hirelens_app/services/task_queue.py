@@ -0,0 +1,254 @@
+import hashlib
+import importlib
+import json
+import os
+import socket
+import threading
+from datetime import timedelta
+
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.utils import timezone
+
+# Task kind -> module exposing STAGES (callables taking the payload as
+# keyword arguments) and optionally on_failure(error, **payload)
+HANDLERS = {
+    "analyze_resume": "hirelens_app.services.analysis_pipeline",
+    "summarize_chat": "hirelens_app.services.chat_memory",
+    "prewarm_interview": "hirelens_app.services.interview_prewarm",
+    "grade_interview": "hirelens_app.services.interview_grading",
+    "bulk_ingest": "hirelens_app.services.bulk_ingest",
+    "match_all_jobs": "hirelens_app.services.job_matcher",
+}
+
+MAX_STAGE_ATTEMPTS = 3
+RETRY_BASE_DELAY = 5      # seconds; doubled on every failed attempt
+LOCK_TIMEOUT = 15 * 60    # a RUNNING task older than this is assumed orphaned
+HEARTBEAT_INTERVAL = 60   # seconds between lock refreshes of a long stage
+CLAIM_SCAN = 10
+
+_current = threading.local()
+
+
+class LockLost(Exception):
+    """The running task was requeued (see requeue_stale) and may run elsewhere."""
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def _create(kind, payload, delay=0, dedupe_key=None):
+    from hirelens_app.models import BackgroundTask
+
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown task kind: {kind}")
+    return BackgroundTask.objects.create(
+        kind=kind,
+        payload=json.dumps(payload),
+        run_after=timezone.now() + timedelta(seconds=delay),
+        dedupe_key=dedupe_key
+    )
+
+
+def enqueue(kind, delay=0, **payload):
+    """Queues a task; call inside the transaction that creates its data."""
+    return _create(kind, payload, delay)
+
+
+def _dedupe_key(kind, payload):
+    return hashlib.sha256(f"{kind}:{json.dumps(payload, sort_keys=True)}".encode()).hexdigest()
+
+
+def enqueue_once(kind, **payload):
+    """
+    enqueue() unless an identical task is already queued or running.
+
+    The check is the unique_pending_task constraint on dedupe_key, not a
+    SELECT first, so two processes racing to queue the same task cannot
+    both succeed (on SQLite and Postgres alike).
+    """
+    dedupe_key = _dedupe_key(kind, payload)
+    try:
+        # Savepoint: a caller's surrounding transaction survives the conflict
+        with transaction.atomic():
+            return _create(kind, payload, dedupe_key=dedupe_key)
+    except IntegrityError:
+        return None
+
+
+def is_pending(kind, **payload):
+    """True while a task queued by enqueue_once(kind, **payload) is queued or running."""
+    from hirelens_app.models import BackgroundTask
+
+    return BackgroundTask.objects.filter(
+        dedupe_key=_dedupe_key(kind, payload),
+        status__in=[BackgroundTask.STATUS_QUEUED, BackgroundTask.STATUS_RUNNING]
+    ).exists()
+
+
+def claim(worker_id):
+    """
+    Atomically takes the oldest due task, or returns None.
+
+    The QUEUED -> RUNNING transition is a conditional UPDATE, so two
+    workers racing for the same row cannot both win; this needs no
+    SELECT ... FOR UPDATE and works the same on SQLite and Postgres.
+    """
+    from hirelens_app.models import BackgroundTask
+
+    now = timezone.now()
+    due = (
+        BackgroundTask.objects
+        .filter(status=BackgroundTask.STATUS_QUEUED, run_after__lte=now)
+        .order_by("run_after", "id")
+        .values_list("id", flat=True)[:CLAIM_SCAN]
+    )
+    for task_id in list(due):
+        won = BackgroundTask.objects.filter(id=task_id, status=BackgroundTask.STATUS_QUEUED).update(
+            status=BackgroundTask.STATUS_RUNNING, locked_by=worker_id, locked_at=now
+        )
+        if won:
+            return BackgroundTask.objects.get(id=task_id)
+    return None
+
+
+def requeue_stale():
+    """Hands tasks of crashed workers back to the queue (resuming at their stage)."""
+    from hirelens_app.models import BackgroundTask
+
+    cutoff = timezone.now() - timedelta(seconds=LOCK_TIMEOUT)
+    return BackgroundTask.objects.filter(
+        status=BackgroundTask.STATUS_RUNNING, locked_at__lt=cutoff
+    ).update(status=BackgroundTask.STATUS_QUEUED, locked_by="", locked_at=None)
+
+
+def heartbeat():
+    """
+    Called periodically by long stages: refreshes locked_at of the task
+    this thread runs, so requeue_stale does not hand it to another worker.
+    Raises LockLost if the task is no longer ours; the stage must stop.
+    No-op outside a task and when called again within HEARTBEAT_INTERVAL.
+    """
+    from hirelens_app.models import BackgroundTask
+
+    task = getattr(_current, "task", None)
+    if task is None:
+        return
+    now = timezone.now()
+    if task.locked_at and (now - task.locked_at).total_seconds() < HEARTBEAT_INTERVAL:
+        return
+    refreshed = BackgroundTask.objects.filter(
+        id=task.id, status=BackgroundTask.STATUS_RUNNING, locked_by=task.locked_by
+    ).update(locked_at=now)
+    if not refreshed:
+        raise LockLost(f"task #{task.id} was requeued")
+    task.locked_at = now
+
+
+def _finish(task, status, **fields):
+    task.status = status
+    task.locked_by = ""
+    task.locked_at = None
+    for name, value in fields.items():
+        setattr(task, name, value)
+    task.save()
+
+
+def load_handler(kind):
+    # import_module, not import_string: the handler module may not have been
+    # imported yet, and then it is not an attribute of the services package
+    return importlib.import_module(HANDLERS[kind])
+
+
+def _fail(task, handler, payload, error, **fields):
+    """Marks the task FAILED and runs the handler's on_failure hook (if it has one)."""
+    from hirelens_app.models import BackgroundTask
+
+    _finish(task, BackgroundTask.STATUS_FAILED, last_error=error, **fields)
+    on_failure = getattr(handler, "on_failure", None)
+    if on_failure:
+        try:
+            on_failure(error, **payload)
+        except Exception as hook_error:
+            print(f"Task Error ({task.kind} #{task.id}) in on_failure: {hook_error}")
+
+
+def run_task(task):
+    """
+    Runs the remaining stages of a claimed task. Returns True when done.
+
+    A failing stage is retried with exponential backoff up to
+    MAX_STAGE_ATTEMPTS times; finished stages are never re-run.
+    """
+    from hirelens_app.models import BackgroundTask
+
+    payload = json.loads(task.payload)
+
+    handler = None
+    try:
+        handler = load_handler(task.kind)
+        stages = handler.STAGES
+    except (KeyError, ImportError, AttributeError) as e:
+        _fail(task, handler, payload, f"No handler: {e}")
+        return False
+
+    while task.stage < len(stages):
+        stage = stages[task.stage]
+        _current.task = task
+        try:
+            stage(**payload)
+        except LockLost as e:
+            # Another worker owns the row now; leave it alone
+            print(f"Task Error ({task.kind} #{task.id}): {e}")
+            return False
+        except Exception as e:
+            error = f"{stage.__name__}: {e}"
+            print(f"Task Error ({task.kind} #{task.id}): {error}")
+            attempts = task.attempts + 1
+
+            if attempts < MAX_STAGE_ATTEMPTS:
+                delay = RETRY_BASE_DELAY * 2 ** (attempts - 1)
+                _finish(
+                    task, BackgroundTask.STATUS_QUEUED,
+                    attempts=attempts, last_error=error,
+                    run_after=timezone.now() + timedelta(seconds=delay)
+                )
+                return False
+
+            _fail(task, handler, payload, error, attempts=attempts)
+            return False
+        finally:
+            _current.task = None
+
+        task.stage += 1
+        task.attempts = 0
+        task.save(update_fields=["stage", "attempts", "updated_at"])
+
+    _finish(task, BackgroundTask.STATUS_DONE, last_error="")
+    return True
+
+
+def work(worker_id=None, stop=None, poll_interval=1.0, burst=False):
+    """
+    Worker loop: claim, run, repeat. Sleeps poll_interval when the queue
+    is empty; with burst=True it returns instead. Returns the number of
+    tasks processed.
+    """
+    worker_id = worker_id or default_worker_id()
+    stop = stop or threading.Event()
+    processed = 0
+    try:
+        while not stop.is_set():
+            close_old_connections()
+            task = claim(worker_id)
+            if task is None:
+                if burst:
+                    break
+                requeue_stale()
+                stop.wait(poll_interval)
+                continue
+            run_task(task)
+            processed += 1
+    finally:
+        connection.close()
+    return processed
@@ -1,7 +1,7 @@
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from .models import HRProfile
+from .models import HRProfile, InterviewSession
 
 @receiver(post_save, sender=User)
 def create_hr_profile(sender, instance, created, **kwargs):
@@ -10,3 +10,12 @@ def create_hr_profile(sender, instance, created, **kwargs):
             user=instance,
             company_name="Default Company"
         )
+
+
+# Cached interview state (services/session_state.py) must not outlive a
+# change to the session row, e.g. the interview being marked completed
+@receiver(post_save, sender=InterviewSession)
+@receiver(post_delete, sender=InterviewSession)
+def invalidate_session_state(sender, instance, **kwargs):
+    from .services.session_state import invalidate
+    invalidate(instance.id)
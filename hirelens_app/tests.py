@@ -1,3 +1,1256 @@
-from django.test import TestCase
+import ast
+import asyncio
+import json
+import subprocess
+import sys
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, override_settings
+
+# =================================================
+# IMPORT-TIME BUDGET
+# =================================================
+IMPORT_BUDGET_SECONDS = 0.75
+HEAVY_MODULES = ["torch", "transformers", "sklearn", "nltk", "openai"]
+
+IMPORT_PROBE = """
+import os, sys, time
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hirelens.settings")
+start = time.perf_counter()
+import django
+django.setup()
+import hirelens_app.urls, hirelens_app.admin
+from hirelens_app.services import (
+    embedding, similarity_engine, skill_engine, skill_matcher, rag_service,
+)
+print(time.perf_counter() - start)
+print("loaded=" + ",".join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+class ImportBudgetTests(SimpleTestCase):
+    """
+    Loading the project (what migrate, createsuperuser and admin-only
+    workers do) must not drag in torch, the OpenAI SDK or the model weights.
+    """
+
+    def _probe(self):
+        result = subprocess.run(
+            [sys.executable, "-c", IMPORT_PROBE.format(heavy=HEAVY_MODULES)],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            timeout=60,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        elapsed, loaded = result.stdout.strip().splitlines()[-2:]
+        return float(elapsed), loaded[len("loaded="):]
+
+    def test_no_heavy_modules_at_import(self):
+        _, loaded = self._probe()
+        self.assertEqual(loaded, "", f"heavy modules imported eagerly: {loaded}")
+
+    def test_import_within_budget(self):
+        elapsed, _ = self._probe()
+        self.assertLess(elapsed, IMPORT_BUDGET_SECONDS)
+
+
+# =================================================
+# TASK QUEUE HANDLERS
+# =================================================
+HANDLER_PROBE = """
+import os
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hirelens.settings")
+import django
+django.setup()
+from hirelens_app.services import task_queue
+for kind in task_queue.HANDLERS:
+    print(kind, len(task_queue.load_handler(kind).STAGES))
+"""
+
+
+class TaskHandlerTests(SimpleTestCase):
+    """
+    Handlers must resolve in a bare worker process (run_workers never
+    imports views, which would otherwise import the handler modules).
+    """
+
+    def test_every_handler_resolves_in_a_fresh_process(self):
+        result = subprocess.run(
+            [sys.executable, "-c", HANDLER_PROBE],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            timeout=60,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        resolved = dict(line.split() for line in result.stdout.strip().splitlines())
+        from hirelens_app.services import task_queue
+        self.assertEqual(set(resolved), set(task_queue.HANDLERS))
+        self.assertTrue(all(int(n) > 0 for n in resolved.values()))
+
+
+# =================================================
+# ANALYSIS PIPELINE
+# =================================================
+LOCMEM_CACHES = {
+    alias: {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": f"{alias}-tests"}
+    for alias in ("default", "llm", "sessions")
+}
+
+
+def make_analysis(**fields):
+    """An HR, a job, a candidate and a queued analysis of them."""
+    from django.contrib.auth.models import User
+    from hirelens_app.models import Candidate, CompanyRequirement, HRProfile, ResumeAnalysis
+
+    user = User.objects.create_user(f"hr{User.objects.count()}", password="pw")
+    job = CompanyRequirement.objects.create(
+        hr=HRProfile.objects.get(user=user), job_title="Backend Developer",
+        required_skills="python, django", minimum_experience=1
+    )
+    candidate = Candidate.objects.create(name="Ada", email="ada@example.com", phone="1", resume="resumes/ada.pdf")
+    return ResumeAnalysis.objects.create(
+        candidate=candidate, job=job, status=ResumeAnalysis.STATUS_QUEUED, **fields
+    )
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class AnalysisPipelineTests(TestCase):
+    """A failed LLM parse must fail the stage (so it is retried), not store an empty analysis."""
+
+    def setUp(self):
+        from hirelens_app.models import ResumeParseCache
+        from hirelens_app.services import analysis_pipeline
+
+        entry = ResumeParseCache(sha256="", extracted_text="Python developer, 5 years of Django.")
+        for patch in [
+            mock.patch.object(analysis_pipeline, "get_resume_entry", return_value=entry),
+            mock.patch.object(analysis_pipeline, "_index_candidate"),
+        ]:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_api_failure_fails_the_stage_and_schedules_a_retry(self):
+        from hirelens_app.models import BackgroundTask
+        from hirelens_app.services import openai_client, task_queue
+
+        analysis = make_analysis()
+        task_queue.enqueue("analyze_resume", analysis_id=analysis.id)
+        with mock.patch.object(openai_client, "achat_completion", side_effect=RuntimeError("API down")):
+            self.assertFalse(task_queue.run_task(task_queue.claim("test")))
+
+        task = BackgroundTask.objects.get()
+        self.assertEqual((task.status, task.stage, task.attempts), (BackgroundTask.STATUS_QUEUED, 0, 1))
+        self.assertIn("parse failed", task.last_error)
+        analysis.refresh_from_db()
+        self.assertEqual((analysis.similarity_score, analysis.extracted_skills_list), (0.0, ""))
+
+    def test_usable_parse_is_scored(self):
+        from hirelens_app.services import analysis_pipeline, resume_parser
+
+        analysis = make_analysis()
+        parsed = json.dumps({"skills": ["Python"], "summary": "Backend developer.", "experience_years": 5})
+        with mock.patch.object(resume_parser, "aquery_llm", mock.AsyncMock(return_value=parsed)):
+            analysis_pipeline.parse_and_match(analysis.id)
+
+        analysis.refresh_from_db()
+        self.assertEqual(analysis.extracted_skills_list, "Python")
+        self.assertEqual(analysis.similarity_score, 50.0)
+
+
+# =================================================
+# INTERVIEW PREWARM
+# =================================================
+@override_settings(CACHES=LOCMEM_CACHES)
+class InterviewPrewarmTests(TestCase):
+    """A pre-warmed session can only be claimed once its opening question exists."""
+
+    def setUp(self):
+        from hirelens_app.services import interview_prewarm
+
+        self.prewarm = interview_prewarm
+        self.analysis = make_analysis()
+        for patch in [
+            mock.patch.object(interview_prewarm, "get_resume_text", return_value="Python developer."),
+            mock.patch.object(interview_prewarm, "index_session", return_value=0),
+        ]:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_session_is_not_claimable_while_being_built(self):
+        claims = []
+
+        def greeting(session_id, user_message=None):
+            claims.append(self.prewarm.claim_session(self.analysis.id))
+            return "Tell me about your last project."
+
+        with mock.patch.object(self.prewarm, "get_ai_response", side_effect=greeting):
+            self.prewarm.prepare(self.analysis.id)
+
+        self.assertEqual(claims, [None])
+        session_id = self.prewarm.claim_session(self.analysis.id)
+        self.assertIsNotNone(session_id)
+        self.assertIsNone(self.prewarm.claim_session(self.analysis.id))
+
+    def test_failed_greeting_leaves_no_session(self):
+        from hirelens_app.models import InterviewSession
+
+        with mock.patch.object(self.prewarm, "get_ai_response", return_value=self.prewarm.CHAT_FALLBACK):
+            with self.assertRaises(RuntimeError):
+                self.prewarm.prepare(self.analysis.id)
+        self.assertFalse(InterviewSession.objects.exists())
+
+    @override_settings(INTERVIEW_PREWARM=True)
+    def test_result_page_reloads_queue_one_prewarm_at_most(self):
+        from hirelens_app.models import BackgroundTask, InterviewSession, ResumeAnalysis
+
+        ResumeAnalysis.objects.filter(id=self.analysis.id).update(status=ResumeAnalysis.STATUS_DONE)
+        self.client.force_login(self.analysis.job.hr.user)
+        for _ in range(3):
+            self.assertEqual(self.client.get(f"/analysis-result/{self.analysis.id}/").status_code, 200)
+        self.assertEqual(BackgroundTask.objects.filter(kind="prewarm_interview").count(), 1)
+
+        # Once the interview exists (here: started and finished), reloads queue nothing
+        BackgroundTask.objects.all().delete()
+        InterviewSession.objects.create(analysis=self.analysis, is_completed=True)
+        self.client.get(f"/analysis-result/{self.analysis.id}/")
+        self.assertFalse(BackgroundTask.objects.exists())
+        self.prewarm.prepare(self.analysis.id)
+        self.assertEqual(InterviewSession.objects.count(), 1)
+
+    def test_half_built_leftover_is_replaced(self):
+        from hirelens_app.models import InterviewSession
+
+        InterviewSession.objects.create(analysis=self.analysis, is_started=False, is_ready=False)
+        with mock.patch.object(self.prewarm, "get_ai_response", return_value="Hello!"):
+            self.prewarm.prepare(self.analysis.id)
+        self.assertEqual(list(InterviewSession.objects.values_list("is_started", "is_ready")), [(False, True)])
+
+
+# =================================================
+# BULK INGESTION
+# =================================================
+@override_settings(CACHES=LOCMEM_CACHES)
+class BulkIngestTests(TestCase):
+    """Failed parses are reported and left uncommitted, so a rerun retries them."""
+
+    def setUp(self):
+        import shutil
+        import tempfile
+        from hirelens_app.services import bulk_ingest, candidate_index
+
+        self.bulk_ingest = bulk_ingest
+        self.job = make_analysis().job
+        self.files = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.files, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=f"{self.files}/media")
+        media.enable()
+        self.addCleanup(media.disable)
+        for patch in [
+            mock.patch.object(bulk_ingest, "recommend_courses_smart", return_value=[]),
+            mock.patch.object(candidate_index, "get_index"),
+            mock.patch.object(candidate_index, "document_embedding", return_value=[0.0]),
+        ]:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def resume(self, name):
+        path = f"{self.files}/{name}.pdf"
+        with open(path, "wb") as f:
+            f.write(f"%PDF {name}".encode())
+        return path
+
+    def test_failed_parse_is_not_committed_and_retried(self):
+        from hirelens_app.models import Candidate
+
+        paths = [self.resume("good"), self.resume("down")]
+
+        def parsed(path, api_up):
+            if "down" in path and not api_up:
+                return "resume text", {}  # what query_llm gives when the API fails
+            return "resume text", {"candidate_name": path.rsplit("/", 1)[-1], "skills": ["Python"], "summary": "Dev."}
+
+        with mock.patch.object(self.bulk_ingest, "get_parsed_resume", side_effect=lambda p: parsed(p, False)):
+            stats = self.bulk_ingest.ingest_resumes(paths, self.job, workers=1)
+        self.assertEqual((stats.done, stats.failed, stats.skipped), (1, 1, 0))
+        self.assertEqual(list(Candidate.objects.filter(resume_sha256__gt="").values_list("name", flat=True)), ["good.pdf"])
+
+        with mock.patch.object(self.bulk_ingest, "get_parsed_resume", side_effect=lambda p: parsed(p, True)):
+            stats = self.bulk_ingest.ingest_resumes(paths, self.job, workers=1)
+        self.assertEqual((stats.done, stats.failed, stats.skipped), (1, 0, 1))
+
+
+    def test_non_numeric_job_is_a_form_error(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from hirelens_app.models import BackgroundTask
+
+        self.client.force_login(self.job.hr.user)
+        for job in ["abc", "", "1.5"]:
+            with self.subTest(job=job):
+                response = self.client.post("/upload-resumes/bulk/", {
+                    "job": job,
+                    "resumes": SimpleUploadedFile("a.pdf", b"%PDF a", content_type="application/pdf"),
+                })
+                self.assertEqual(response.status_code, 200)
+                self.assertIn("Please select a job requirement", response.context["error"])
+        self.assertFalse(BackgroundTask.objects.exists())
+
+# =================================================
+# ALL-JOBS MATCHING
+# =================================================
+@override_settings(CACHES=LOCMEM_CACHES)
+class JobMatchTests(TestCase):
+    """Uploads queue the all-jobs match; the match page reads the index and never embeds the resume."""
+
+    def setUp(self):
+        from hirelens_app.services import candidate_index, job_matcher
+
+        self.job_matcher = job_matcher
+        self.analysis = make_analysis(similarity_score=50.0)
+        self.hr = self.analysis.job.hr
+        self.client.force_login(self.hr.user)
+        self.index = mock.Mock()
+        self.index.vector.return_value = None
+        for patch in [
+            mock.patch.object(candidate_index, "get_index", return_value=self.index),
+            mock.patch.object(candidate_index, "document_embedding", side_effect=AssertionError("resume embedded")),
+            mock.patch.object(job_matcher, "get_resume_entry", side_effect=AssertionError("resume parsed")),
+        ]:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_upload_for_all_jobs_only_queues_the_match(self):
+        import shutil
+        import tempfile
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from hirelens_app.models import BackgroundTask, Candidate
+
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        with override_settings(MEDIA_ROOT=media):
+            response = self.client.post("/upload-resume/", {
+                "job": "all", "name": "Bob", "email": "bob@example.com", "phone": "2",
+                "resume": SimpleUploadedFile("bob.pdf", b"%PDF bob", content_type="application/pdf"),
+            })
+        candidate = Candidate.objects.get(name="Bob")
+        self.assertRedirects(response, f"/match-all-jobs/{candidate.id}/", fetch_redirect_response=False)
+        task = BackgroundTask.objects.get(kind="match_all_jobs")
+        self.assertEqual(json.loads(task.payload), {"candidate_id": candidate.id, "hr_id": self.hr.id})
+
+        response = self.client.get(f"/match-all-jobs/{candidate.id}/")
+        self.assertTrue(response.context["pending"])
+
+    def test_match_page_reads_scores_from_the_index(self):
+        import numpy as np
+
+        self.index.vector.return_value = np.array([1.0, 0.0], dtype=np.float32)
+        with mock.patch("hirelens_app.services.embedding.get_embeddings",
+                        return_value=np.array([[0.5, 0.5]], dtype=np.float32)):
+            response = self.client.get(f"/match-all-jobs/{self.analysis.candidate_id}/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["results"][0]["semantic_score"], 50.0)
+        self.assertFalse(response.context["pending"])
+        self.index.vector.assert_called_once_with(self.analysis.candidate_id)
+        self.index.add.assert_not_called()
+
+    def test_failed_parse_fails_the_match_stage_and_writes_nothing(self):
+        from hirelens_app.models import CompanyRequirement, ResumeAnalysis, ResumeParseCache
+
+        CompanyRequirement.objects.create(hr=self.hr, job_title="Data Engineer", required_skills="sql", minimum_experience=1)
+        entry = ResumeParseCache(sha256="", extracted_text="Python developer, 5 years of Django.")
+        with mock.patch.object(self.job_matcher, "get_resume_entry", return_value=entry), \
+                mock.patch.object(self.job_matcher, "parse_resume_text", return_value={}):
+            with self.assertRaises(ValueError):
+                self.job_matcher.match_all(candidate_id=self.analysis.candidate_id, hr_id=self.hr.id)
+        self.assertEqual(ResumeAnalysis.objects.count(), 1)
+        self.index.add.assert_not_called()
+
+
+# =================================================
+# CHAT MEMORY (rolling summary)
+# =================================================
+@override_settings(CACHES=LOCMEM_CACHES)
+class ChatMemoryTests(TestCase):
+    """Older turns are folded into the summary; the newest stay verbatim."""
+
+    def setUp(self):
+        from hirelens_app.models import InterviewSession
+        from hirelens_app.services import chat_memory, openai_client, session_state
+
+        self.memory = chat_memory
+        self.state = session_state
+        self.session = InterviewSession.objects.create(analysis=make_analysis())
+        self.llm = mock.Mock(return_value=mock.Mock(
+            choices=[mock.Mock(message=mock.Mock(content="Asked about Django; solid answers."))]
+        ))
+        patch = mock.patch.object(openai_client, "chat_completion", self.llm)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def chat(self, count):
+        for i in range(count):
+            self.state.append(self.session.id, "ai" if i % 2 == 0 else "candidate", f"message {i}")
+
+    def fold_tasks(self):
+        from hirelens_app.models import BackgroundTask
+
+        return BackgroundTask.objects.filter(kind="summarize_chat").count()
+
+    def test_fold_is_scheduled_once_when_the_window_fills(self):
+        threshold = self.memory.RECENT_MESSAGES + self.memory.FOLD_BATCH
+        self.chat(threshold - 1)
+        self.memory.recent_history(self.state.load(self.session.id))
+        self.assertEqual(self.fold_tasks(), 0)
+
+        self.chat(1)
+        for _ in range(3):
+            self.memory.recent_history(self.state.load(self.session.id))
+        self.assertEqual(self.fold_tasks(), 1)
+
+    def test_fold_summarizes_all_but_the_recent_messages(self):
+        from hirelens_app.models import ChatMessage
+
+        self.chat(20)
+        self.state.load(self.session.id)  # cached before the fold
+        self.memory.fold(self.session.id)
+
+        ids = list(ChatMessage.objects.filter(session=self.session).order_by("id").values_list("id", flat=True))
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.summary, "Asked about Django; solid answers.")
+        self.assertEqual(self.session.summarized_through, ids[-self.memory.RECENT_MESSAGES - 1])
+        prompt = self.llm.call_args.kwargs["messages"][0]["content"]
+        self.assertIn("message 11", prompt)
+        self.assertNotIn("message 12", prompt)
+
+        # The next turn sees the new summary plus only the verbatim tail
+        summary, history = self.memory.recent_history(self.state.load(self.session.id))
+        self.assertEqual(summary, self.session.summary)
+        self.assertEqual([m["content"] for m in history], [f"message {i}" for i in range(12, 20)])
+
+    def test_concurrent_fold_keeps_the_first_result(self):
+        from hirelens_app.models import InterviewSession
+
+        self.chat(20)
+
+        def summarize(*args, **kwargs):
+            # Another worker finishes its fold while this one waits on the LLM
+            InterviewSession.objects.filter(id=self.session.id).update(summary="other fold", summarized_through=1)
+            return mock.Mock(choices=[mock.Mock(message=mock.Mock(content="late fold"))])
+
+        self.llm.side_effect = summarize
+        self.memory.fold(self.session.id)
+        self.session.refresh_from_db()
+        self.assertEqual((self.session.summary, self.session.summarized_through), ("other fold", 1))
+
+    def test_large_backlog_is_folded_in_steps(self):
+        self.chat(self.memory.MAX_FOLD + self.memory.RECENT_MESSAGES + 5)
+        self.memory.fold(self.session.id)
+        self.assertEqual(self.fold_tasks(), 1)  # follow-up for the rest of the backlog
+        self.memory.fold(self.session.id)
+        self.memory.fold(self.session.id)  # nothing left to fold: no LLM call
+        self.assertEqual(self.llm.call_count, 2)
+
+
+# =================================================
+# INTERVIEW GRADING
+# =================================================
+@override_settings(CACHES=LOCMEM_CACHES)
+class InterviewGradingTests(TestCase):
+    """Grades are only saved when the LLM really graded every answer."""
+
+    def setUp(self):
+        from hirelens_app.models import ChatMessage, InterviewSession
+        from hirelens_app.services import interview_engine, task_queue
+
+        self.engine = interview_engine
+        session = InterviewSession.objects.create(analysis=make_analysis())
+        for sender, text in [("ai", "What is a decorator?"), ("candidate", "A function wrapper."),
+                             ("ai", "What is the GIL?"), ("candidate", "An interpreter lock.")]:
+            ChatMessage.objects.create(session=session, sender=sender, message_text=text)
+        self.session = session
+        self.task = task_queue.enqueue("grade_interview", session_id=session.id)
+
+    def grade(self, *responses):
+        from hirelens_app.services import task_queue
+
+        llm = mock.AsyncMock(side_effect=list(responses))
+        with mock.patch.object(self.engine, "aquery_llm", llm):
+            return task_queue.run_task(task_queue.claim("test"))
+
+    def test_failed_batch_is_retried_and_saves_nothing(self):
+        from hirelens_app.models import BackgroundTask, InterviewResult
+
+        self.assertFalse(self.grade("{}"))  # what aquery_llm returns when the API fails
+        self.task.refresh_from_db()
+        self.assertEqual((self.task.status, self.task.attempts), (BackgroundTask.STATUS_QUEUED, 1))
+        self.assertFalse(InterviewResult.objects.exists())
+
+    def test_failed_single_fallback_saves_nothing(self):
+        from hirelens_app.models import InterviewResult
+
+        batch = json.dumps({"results": [{"index": 1, "score": 80, "feedback": "Good.", "is_correct": True}]})
+        self.assertFalse(self.grade(batch, "{}"))
+        self.assertFalse(InterviewResult.objects.exists())
+
+    def test_scores_are_saved_as_integers(self):
+        from hirelens_app.models import InterviewResult
+
+        batch = json.dumps({"results": [{"index": 1, "score": "85/100", "feedback": "Good.", "is_correct": True}]})
+        single = json.dumps({"score": 40.4, "feedback": "Vague.", "is_correct": False})
+        self.assertTrue(self.grade(batch, single))
+        self.assertEqual(
+            list(InterviewResult.objects.filter(session=self.session).order_by("id").values_list("ai_score", flat=True)),
+            [85, 40]
+        )
+
+
+# =================================================
+# TASK QUEUE
+# =================================================
+class TaskQueueTests(TestCase):
+    """Claiming, retries and lock handling of the DB-backed task queue."""
+
+    def run_stages(self, *stages):
+        """Runs the next claimed task with the given stages as its handler."""
+        from types import SimpleNamespace
+        from hirelens_app.services import task_queue
+
+        with mock.patch.object(task_queue, "load_handler", return_value=SimpleNamespace(STAGES=list(stages))):
+            return task_queue.run_task(task_queue.claim("worker-1"))
+
+    def test_each_task_is_claimed_by_one_worker(self):
+        from hirelens_app.services import task_queue
+
+        for session_id in range(3):
+            task_queue.enqueue("grade_interview", session_id=session_id)
+        claimed = [task_queue.claim(f"worker-{i}") for i in range(4)]
+
+        self.assertEqual(len({t.id for t in claimed[:3]}), 3)
+        self.assertIsNone(claimed[3])
+        self.assertEqual([t.locked_by for t in claimed[:3]], ["worker-0", "worker-1", "worker-2"])
+
+    def test_lost_claim_race_moves_on_to_the_next_task(self):
+        from hirelens_app.models import BackgroundTask
+        from hirelens_app.services import task_queue
+
+        first = task_queue.enqueue("grade_interview", session_id=1)
+        second = task_queue.enqueue("grade_interview", session_id=2)
+        real_filter = BackgroundTask.objects.filter
+
+        def racing_filter(*args, **kwargs):
+            # Another worker takes the first task between our SELECT and UPDATE
+            if kwargs.get("id") == first.id and "status" in kwargs:
+                real_filter(id=first.id).update(status=BackgroundTask.STATUS_RUNNING, locked_by="worker-2")
+            return real_filter(*args, **kwargs)
+
+        with mock.patch.object(BackgroundTask.objects, "filter", side_effect=racing_filter):
+            task = task_queue.claim("worker-1")
+        self.assertEqual(task.id, second.id)
+        first.refresh_from_db()
+        self.assertEqual(first.locked_by, "worker-2")
+
+    def test_failing_stage_is_retried_with_backoff_then_fails(self):
+        from django.utils import timezone
+        from hirelens_app.models import BackgroundTask
+        from hirelens_app.services import task_queue
+
+        task = task_queue.enqueue("grade_interview", session_id=1)
+        done, attempts = [], []
+
+        def first(**payload):
+            done.append("first")
+
+        def flaky(**payload):
+            attempts.append(1)
+            raise RuntimeError("upstream down")
+
+        for attempt in range(1, task_queue.MAX_STAGE_ATTEMPTS + 1):
+            before = timezone.now()
+            self.assertFalse(self.run_stages(first, flaky))
+            task.refresh_from_db()
+            if attempt < task_queue.MAX_STAGE_ATTEMPTS:
+                delay = task_queue.RETRY_BASE_DELAY * 2 ** (attempt - 1)
+                self.assertEqual((task.status, task.stage, task.attempts), (BackgroundTask.STATUS_QUEUED, 1, attempt))
+                self.assertGreaterEqual((task.run_after - before).total_seconds(), delay - 1)
+                self.assertIsNone(task_queue.claim("worker-1"))  # not due yet
+                BackgroundTask.objects.filter(id=task.id).update(run_after=timezone.now())
+
+        self.assertEqual(task.status, BackgroundTask.STATUS_FAILED)
+        self.assertIn("upstream down", task.last_error)
+        self.assertEqual(done, ["first"])  # a finished stage is never re-run
+        self.assertEqual(len(attempts), task_queue.MAX_STAGE_ATTEMPTS)
+
+    def test_requeue_stale_only_touches_orphaned_tasks(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from hirelens_app.models import BackgroundTask
+        from hirelens_app.services import task_queue
+
+        for session_id in range(2):
+            task_queue.enqueue("grade_interview", session_id=session_id)
+        orphan, alive = task_queue.claim("crashed"), task_queue.claim("alive")
+        BackgroundTask.objects.filter(id=orphan.id).update(
+            locked_at=timezone.now() - timedelta(seconds=task_queue.LOCK_TIMEOUT + 1)
+        )
+
+        self.assertEqual(task_queue.requeue_stale(), 1)
+        orphan.refresh_from_db()
+        alive.refresh_from_db()
+        self.assertEqual((orphan.status, orphan.locked_by), (BackgroundTask.STATUS_QUEUED, ""))
+        self.assertEqual((alive.status, alive.locked_by), (BackgroundTask.STATUS_RUNNING, "alive"))
+        self.assertEqual(task_queue.claim("worker-1").id, orphan.id)
+
+    def test_enqueue_once_is_enforced_by_the_database(self):
+        from django.db import transaction
+        from hirelens_app.models import BackgroundTask
+        from hirelens_app.services import task_queue
+
+        first = task_queue.enqueue_once("grade_interview", session_id=7)
+        self.assertIsNotNone(first)
+        # A racing process that passed any pre-check still hits the constraint
+        with transaction.atomic():
+            self.assertIsNone(task_queue.enqueue_once("grade_interview", session_id=7))
+            self.assertIsNotNone(task_queue.enqueue_once("grade_interview", session_id=8))
+        self.assertEqual(BackgroundTask.objects.count(), 2)
+
+        # Running still counts as pending; a finished task can be queued again
+        task_queue.claim("worker-1")
+        self.assertIsNone(task_queue.enqueue_once("grade_interview", session_id=7))
+        BackgroundTask.objects.filter(id=first.id).update(status=BackgroundTask.STATUS_DONE)
+        self.assertIsNotNone(task_queue.enqueue_once("grade_interview", session_id=7))
+
+    def test_heartbeat_keeps_a_long_stage_locked(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from hirelens_app.models import BackgroundTask
+        from hirelens_app.services import task_queue
+
+        task_queue.enqueue("bulk_ingest", job_id=1, staging="x")
+        seen = []
+
+        def long_stage(**payload):
+            # Pretend the last heartbeat was longer ago than LOCK_TIMEOUT allows
+            stale = timezone.now() - timedelta(seconds=task_queue.LOCK_TIMEOUT - 1)
+            BackgroundTask.objects.update(locked_at=stale)
+            task_queue._current.task.locked_at = stale
+            task_queue.heartbeat()
+            seen.append(task_queue.requeue_stale())
+
+        self.assertTrue(self.run_stages(long_stage))
+        self.assertEqual(seen, [0])
+
+    def test_stage_stops_when_its_task_was_requeued(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from hirelens_app.models import BackgroundTask
+        from hirelens_app.services import task_queue
+
+        task = task_queue.enqueue("bulk_ingest", job_id=1, staging="x")
+        batches = []
+
+        def long_stage(**payload):
+            # Lock expired and another worker took the task over
+            expired = timezone.now() - timedelta(seconds=task_queue.LOCK_TIMEOUT + 1)
+            BackgroundTask.objects.update(locked_at=expired)
+            task_queue._current.task.locked_at = expired
+            task_queue.requeue_stale()
+            task_queue.claim("worker-2")
+            task_queue.heartbeat()
+            batches.append("committed")
+
+        self.assertFalse(self.run_stages(long_stage))
+        self.assertEqual(batches, [])
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.locked_by, task.attempts), (BackgroundTask.STATUS_RUNNING, "worker-2", 0))
+
+
+# =================================================
+# PROMPT TOKEN BUDGETS
+# =================================================
+class ByteEncoding:
+    """Stand-in tokenizer: one token per UTF-8 byte."""
+
+    def encode(self, text, disallowed_special=()):
+        return list(text.encode())
+
+    def decode(self, tokens):
+        return bytes(tokens).decode(errors="ignore")
+
+
+class PromptBudgetTests(SimpleTestCase):
+    """trim_to_tokens / fit_history never exceed their budget, with a tokenizer or the estimate."""
+
+    TEXT = "Python developer. Built Django APIs for payments! Led a team of four?\nLikes chess."
+
+    MODES = [("estimate", None), ("tokenizer", ByteEncoding())]
+
+    def budgets(self):
+        """(mode, prompt_budget) for the char estimate and for a real tokenizer."""
+        from hirelens_app.services import prompt_budget
+
+        for name, encoding in self.MODES:
+            patch = mock.patch.object(prompt_budget, "_encoding", return_value=encoding)
+            patch.start()
+            try:
+                yield name, prompt_budget
+            finally:
+                patch.stop()
+
+    def test_trim_keeps_whole_sentences_within_budget(self):
+        for mode, pb in self.budgets():
+            with self.subTest(mode=mode):
+                # Sentences are costed one by one, trailing whitespace included
+                budget = pb.count_tokens("Python developer. ") + pb.count_tokens("Built Django APIs for payments! ")
+                trimmed = pb.trim_to_tokens(self.TEXT, budget)
+                self.assertEqual(trimmed, "Python developer. Built Django APIs for payments!")
+                self.assertLessEqual(pb.count_tokens(trimmed), budget)
+
+    def test_trim_cuts_a_too_long_first_sentence(self):
+        for mode, pb in self.budgets():
+            with self.subTest(mode=mode):
+                trimmed = pb.trim_to_tokens(self.TEXT, 5)
+                self.assertTrue(trimmed)
+                self.assertTrue(self.TEXT.startswith(trimmed))
+                self.assertLessEqual(pb.count_tokens(trimmed), 5)
+
+    def test_trim_leaves_fitting_text_alone(self):
+        for mode, pb in self.budgets():
+            with self.subTest(mode=mode):
+                self.assertEqual(pb.trim_to_tokens(self.TEXT, 10_000), self.TEXT)
+                self.assertEqual(pb.trim_to_tokens(self.TEXT, 0), "")
+
+    def test_fit_history_keeps_the_most_recent_turns_in_order(self):
+        history = [{"role": "user", "content": f"answer number {i} " * 5} for i in range(10)]
+        for mode, pb in self.budgets():
+            with self.subTest(mode=mode):
+                cost = pb.count_message_tokens(history[-1:])
+                kept = pb.fit_history(history, 3 * cost + cost // 2)
+                self.assertEqual(kept, history[-3:])
+                self.assertLessEqual(pb.count_message_tokens(kept), 3 * cost + cost // 2)
+                self.assertEqual(pb.fit_history(history, cost - 1), [])
+                self.assertEqual(pb.fit_history(history, 10_000), history)
+
+    def test_failed_tokenizer_load_is_retried_later(self):
+        from hirelens_app.services import prompt_budget
+
+        tiktoken = mock.Mock()
+        tiktoken.encoding_for_model.side_effect = [OSError("no network"), ByteEncoding()]
+        with mock.patch.dict("sys.modules", tiktoken=tiktoken), \
+                mock.patch.dict(prompt_budget._encodings, clear=True), \
+                mock.patch.dict(prompt_budget._encoding_failed_at, clear=True), \
+                mock.patch.object(prompt_budget.time, "monotonic", side_effect=[100.0, 110.0, 200.0]):
+            self.assertIsNone(prompt_budget._encoding("test-model"))      # load fails at t=100
+            self.assertIsNone(prompt_budget._encoding("test-model"))      # t=110: not retried yet
+            self.assertIsInstance(prompt_budget._encoding("test-model"), ByteEncoding)  # t=200: retried
+        self.assertEqual(tiktoken.encoding_for_model.call_count, 2)
+
+
+# =================================================
+# LLM RESPONSE CACHE
+# =================================================
+@override_settings(CACHES={
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "llm": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "llm-cache-tests", "TIMEOUT": 1},
+})
+class LLMCacheTests(SimpleTestCase):
+    """Response cache key, hits, misses and TTL."""
+
+    def setUp(self):
+        from django.core.cache import caches
+        from hirelens_app.services import llm_cache, llm_engine
+
+        caches["llm"].clear()
+        self.llm_cache = llm_cache
+        self.engine = llm_engine
+        self.upstream = mock.Mock(side_effect=lambda request, site: ('{"answer": 42}', 1.5))
+        patch = mock.patch.object(llm_engine, "_complete", self.upstream)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_key_covers_exactly_what_determines_the_completion(self):
+        request = self.engine._request("hello", json_mode=True)
+        key = self.llm_cache.make_key(request)
+        self.assertEqual(key, self.llm_cache.make_key(dict(reversed(list(request.items())))))
+        for change in [
+            {"temperature": 0.0},
+            {"model": "gpt-4o"},
+            {"response_format": {"type": "text"}},
+            {"messages": request["messages"][:1]},
+        ]:
+            with self.subTest(change=change):
+                self.assertNotEqual(key, self.llm_cache.make_key(dict(request, **change)))
+
+    def test_repeated_prompt_is_a_hit(self):
+        before = self.llm_cache.stats()
+        self.assertEqual(self.engine.query_llm("hello", json_mode=True), '{"answer": 42}')
+        self.assertEqual(self.engine.query_llm("hello", json_mode=True), '{"answer": 42}')
+        self.engine.query_llm("hello", json_mode=True, cache=False)
+
+        self.assertEqual(self.upstream.call_count, 2)  # first call and the cache=False one
+        after = self.llm_cache.stats()
+        self.assertEqual(after["hits"] - before["hits"], 1)
+        self.assertEqual(after["misses"] - before["misses"], 1)
+        self.assertAlmostEqual(after["saved_seconds"] - before["saved_seconds"], 1.5)
+
+    def test_different_prompt_or_temperature_is_a_miss(self):
+        self.engine.query_llm("hello", json_mode=True)
+        self.engine.query_llm("hello again", json_mode=True)
+        self.engine.query_llm("hello", json_mode=True, deterministic=True)
+        self.assertEqual(self.upstream.call_count, 3)
+
+    def test_entries_expire_after_the_ttl(self):
+        self.engine.query_llm("hello", json_mode=True)
+        time.sleep(1.1)
+        self.engine.query_llm("hello", json_mode=True)
+        self.assertEqual(self.upstream.call_count, 2)
+
+    def test_invalid_json_is_not_cached(self):
+        self.upstream.side_effect = lambda request, site: ("not json", 0.1)
+        self.engine.query_llm("hello", json_mode=True)
+        self.engine.query_llm("hello", json_mode=True)
+        self.assertEqual(self.upstream.call_count, 2)
+
+
+# =================================================
+# CANDIDATE VECTOR INDEX
+# =================================================
+class CandidateIndexTests(SimpleTestCase):
+    """Blocked top-K search over the memory-mapped index (pure numpy, no model)."""
+
+    DIM = 16
+
+    def setUp(self):
+        import shutil
+        import tempfile
+        import numpy as np
+        from hirelens_app.services import candidate_index
+
+        self.np = np
+        self.module = candidate_index
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.index = candidate_index.CandidateIndex(directory, self.DIM)
+
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(300, self.DIM)).astype(np.float32)
+        self.vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        self.ids = list(range(1000, 1300))
+        self.query = self.vectors[7] + 0.1 * rng.normal(size=self.DIM).astype(np.float32)
+
+    def brute_force(self, top_k, pool=None):
+        stored = self.vectors.astype(self.np.float16).astype(self.np.float32)
+        scores = stored @ self.query
+        ranked = sorted(zip(self.ids, scores), key=lambda item: -item[1])
+        return [cid for cid, _ in ranked if pool is None or cid in pool][:top_k]
+
+    def test_top_k_matches_brute_force_across_blocks(self):
+        self.assertEqual(self.index.add(self.ids, self.vectors), 300)
+        with mock.patch.object(self.module, "BLOCK_ROWS", 64):  # several blocks
+            results = self.index.search(self.query, top_k=10)
+
+        self.assertEqual([cid for cid, _ in results], self.brute_force(10))
+        scores = [score for _, score in results]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_search_is_restricted_to_the_candidate_pool(self):
+        self.index.add(self.ids, self.vectors)
+        pool = set(self.ids[::7])
+        with mock.patch.object(self.module, "BLOCK_ROWS", 64):
+            results = self.index.search(self.query, top_k=5, candidate_ids=pool)
+
+        self.assertEqual([cid for cid, _ in results], self.brute_force(5, pool))
+        self.assertEqual(self.index.search(self.query, top_k=5, candidate_ids=[]), [])
+
+    def test_candidates_are_only_added_once(self):
+        self.index.add(self.ids[:10], self.vectors[:10])
+        self.assertEqual(self.index.add(self.ids[:20], self.vectors[:20]), 10)
+        self.assertEqual(len(self.index), 20)
+
+    def test_torn_tail_is_truncated_before_appending(self):
+        np = self.np
+        self.index.add(self.ids[:2], self.vectors[:2])
+        # Crash between the two appends: a vector without its id, plus half an id
+        with open(self.index.vectors_path, "ab") as f:
+            f.write(self.vectors[2].astype(np.float16).tobytes())
+        with open(self.index.ids_path, "ab") as f:
+            f.write(b"\x01\x02\x03")
+        self.assertEqual(len(self.index), 2)
+
+        self.index.add([self.ids[3]], self.vectors[3:4])
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self.index.search(self.vectors[3], top_k=1)[0][0], self.ids[3])
+        row_bytes = self.DIM * 2
+        self.assertEqual(self.index.vectors_path.stat().st_size, 3 * row_bytes)
+        self.assertEqual(self.index.ids_path.stat().st_size, 3 * 8)
+
+
+# =================================================
+# EMBEDDING BACKEND ACCURACY
+# =================================================
+class EmbeddingBackendAccuracyTests(SimpleTestCase):
+    """
+    The ONNX backends must reproduce the fp32 torch cosine scores on the
+    fixed corpus. Skipped until `manage.py export_embedding_onnx` has run.
+    """
+
+    # (max |Δcos|, mean |Δcos|, min top-1 agreement) per backend
+    TOLERANCES = {
+        "onnx": (1e-4, 1e-5, 1.0),
+        "onnx-int8": (0.05, 0.015, 0.9),
+    }
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        from hirelens_app.services.embedding import MODEL_NAME
+        from hirelens_app.services.embedding_backends import ONNX_FILES, TORCH, load_backend
+
+        if not all((settings.EMBEDDING_ONNX_DIR / f).exists() for f in ONNX_FILES.values()):
+            raise unittest.SkipTest("ONNX models not exported")
+        try:
+            cls.load = staticmethod(lambda name: load_backend(name, MODEL_NAME, settings.EMBEDDING_ONNX_DIR))
+            cls.reference = cls.load(TORCH)
+        except (ImportError, OSError) as e:
+            raise unittest.SkipTest(f"embedding backends unavailable: {e}")
+
+    def test_onnx_backends_match_fp32_reference(self):
+        from hirelens_app.services.embedding_eval import accuracy_report
+
+        for name, (max_diff, mean_diff, top1) in self.TOLERANCES.items():
+            with self.subTest(backend=name):
+                report = accuracy_report(self.load(name), self.reference)
+                self.assertLess(report["max_abs_diff"], max_diff)
+                self.assertLess(report["mean_abs_diff"], mean_diff)
+                self.assertGreaterEqual(report["top1_agreement"], top1)
+
+
+# =================================================
+# OPENAI CLIENT: TIMEOUTS, RETRIES, CIRCUIT BREAKER
+# =================================================
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """
+    OpenAI-compatible /chat/completions. Each request consumes the next
+    scripted behaviour: ("ok", delay), ("status", code) or ("hang", seconds).
+    """
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with server.lock:
+            server.requests += 1
+            kind, arg = server.script.pop(0) if server.script else ("ok", 0)
+
+        if kind == "status":
+            self._send(arg, {"error": {"message": "injected failure", "type": "server_error"}})
+            return
+        time.sleep(arg)
+        self._send(200, {
+            "id": "chatcmpl-test",
+            "object": "chat.completion",
+            "created": 0,
+            "model": body["model"],
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": '{"ok": true}'},
+            }],
+        })
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client gave up (timeout)
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(
+    OPENAI_API_KEY="test-key",
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "llm": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "llm-tests"},
+    },
+)
+class FakeOpenAITestCase(SimpleTestCase):
+    """Runs a FakeOpenAIHandler server for the test class; setUp resets its script."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        try:
+            import openai  # noqa: F401
+        except ImportError:
+            raise unittest.SkipTest("openai SDK not installed")
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenAIHandler)
+        cls.server.lock = threading.Lock()
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}/v1"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        from hirelens_app.services import openai_client
+
+        self.client_module = openai_client
+        self.server.script = []
+        self.server.requests = 0
+
+        base_url = override_settings(OPENAI_BASE_URL=self.base_url)
+        base_url.enable()
+        self.addCleanup(base_url.disable)
+        openai_client.reset_clients()
+        self.addCleanup(openai_client.reset_clients)
+
+
+@override_settings(
+    OPENAI_API_KEY="test-key",
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "llm": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "llm-tests"},
+    },
+)
+class OpenAIClientTests(FakeOpenAITestCase):
+    """The shared client against a local fake server that injects latency and failures."""
+
+    def setUp(self):
+        super().setUp()
+        openai_client = self.client_module
+        for patch in [
+            mock.patch.object(openai_client, "BACKOFF_BASE", 0.01),
+            mock.patch.object(openai_client, "breaker", openai_client.CircuitBreaker(
+                window=4, min_calls=4, failure_ratio=0.5, cooldown=0.3
+            )),
+            mock.patch.dict(openai_client.TIMEOUTS, {"default": 0.5}),
+        ]:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def call(self, **kwargs):
+        return self.client_module.chat_completion(
+            model="gpt-4o-mini",
+            messages=[{"role": "user", "content": "hi"}],
+            **kwargs
+        )
+
+    def test_transient_errors_are_retried(self):
+        self.server.script = [("status", 500), ("status", 429)]
+        response = self.call()
+        self.assertEqual(response.choices[0].message.content, '{"ok": true}')
+        self.assertEqual(self.server.requests, 3)
+
+    def test_gives_up_after_max_retries(self):
+        import openai
+
+        self.server.script = [("status", 503)] * 3
+        with self.assertRaises(openai.InternalServerError):
+            self.call()
+        self.assertEqual(self.server.requests, self.client_module.MAX_RETRIES + 1)
+
+    def test_client_errors_are_not_retried(self):
+        import openai
+
+        self.server.script = [("status", 400)]
+        with self.assertRaises(openai.BadRequestError):
+            self.call()
+        self.assertEqual(self.server.requests, 1)
+
+    def test_slow_upstream_is_cut_off_by_the_site_timeout(self):
+        import openai
+
+        self.server.script = [("ok", 3)] * 3
+        started = time.monotonic()
+        with self.assertRaises(openai.APITimeoutError):
+            self.call()
+        # 3 attempts x 0.5s timeout plus tiny backoffs, far below the 3s hang
+        self.assertLess(time.monotonic() - started, 2.5)
+
+    def test_breaker_opens_fails_fast_and_recovers(self):
+        self.server.script = [("status", 500)] * 4
+        with mock.patch.object(self.client_module, "MAX_RETRIES", 0):
+            for _ in range(4):
+                with self.assertRaises(Exception):
+                    self.call()
+            self.assertEqual(self.client_module.breaker.state, "open")
+
+            with self.assertRaises(self.client_module.CircuitOpenError):
+                self.call()
+            self.assertEqual(self.server.requests, 4)  # no request while open
+
+            time.sleep(0.35)
+            self.call()  # half-open trial succeeds
+            self.assertEqual(self.client_module.breaker.state, "closed")
+
+    def test_query_llm_falls_back_while_breaker_is_open(self):
+        from hirelens_app.services.llm_engine import query_llm
+
+        self.server.script = [("status", 500)] * 4
+        with mock.patch.object(self.client_module, "MAX_RETRIES", 0):
+            for _ in range(4):
+                query_llm("hello", json_mode=True, cache=False)
+        self.assertEqual(query_llm("hello", json_mode=True, cache=False), "{}")
+        self.assertEqual(self.server.requests, 4)
+
+    def test_async_calls_share_timeouts_and_retries(self):
+        self.server.script = [("status", 502)]
+
+        async def run():
+            return await self.client_module.achat_completion(
+                model="gpt-4o-mini",
+                messages=[{"role": "user", "content": "hi"}]
+            )
+
+        response = asyncio.run(run())
+        self.assertEqual(response.choices[0].message.content, '{"ok": true}')
+        self.assertEqual(self.server.requests, 2)
+
+
+# =================================================
+# SINGLE FLIGHT (coalescing identical LLM calls)
+# =================================================
+SINGLE_FLIGHT_PROBE = """
+import os, sys
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hirelens.settings")
+import django
+django.setup()
+from django.test import override_settings
+override_settings(
+    CACHES={{"llm": {{
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": {cache_dir!r},
+    }}}},
+    SINGLE_FLIGHT_LOCK_DIR={lock_dir!r},
+).enable()
+from hirelens_app.services import single_flight
+from hirelens_app.services.llm_engine import query_llm
+print(query_llm("coalesce me", json_mode=True, cache=False))
+print(single_flight.stats())
+"""
+
+
+@override_settings(
+    OPENAI_API_KEY="test-key",
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "llm": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "single-flight-tests"},
+    },
+)
+class SingleFlightTests(FakeOpenAITestCase):
+    """N concurrent identical LLM calls make one upstream request, within and across processes."""
+
+    CALLERS = 8
+
+    def setUp(self):
+        import shutil
+        import tempfile
+
+        super().setUp()
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        lock_dir = override_settings(SINGLE_FLIGHT_LOCK_DIR=f"{self.tmp}/locks")
+        lock_dir.enable()
+        self.addCleanup(lock_dir.disable)
+
+    def concurrently(self, fn):
+        """Runs fn in CALLERS threads released at once; returns results or exceptions."""
+        barrier = threading.Barrier(self.CALLERS)
+        results = [None] * self.CALLERS
+
+        def call(i):
+            barrier.wait()
+            try:
+                results[i] = fn()
+            except Exception as e:
+                results[i] = e
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(self.CALLERS)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=30)
+        return results
+
+    def test_threads_share_one_upstream_request(self):
+        from hirelens_app.services import single_flight
+        from hirelens_app.services.llm_engine import query_llm
+
+        self.server.script = [("ok", 0.5)]
+        before = single_flight.stats()
+        results = self.concurrently(lambda: query_llm("coalesce me", json_mode=True, cache=False))
+
+        self.assertEqual(results, ['{"ok": true}'] * self.CALLERS)
+        self.assertEqual(self.server.requests, 1)
+        after = single_flight.stats()
+        self.assertEqual(after["leaders"] - before["leaders"], 1)
+        self.assertEqual(after["followers"] - before["followers"], self.CALLERS - 1)
+
+    def test_processes_share_one_upstream_request(self):
+        import os
+
+        self.server.script = [("ok", 2)]
+        probe = SINGLE_FLIGHT_PROBE.format(cache_dir=f"{self.tmp}/cache", lock_dir=f"{self.tmp}/locks")
+        env = dict(os.environ, OPENAI_BASE_URL=self.base_url, OPENAI_API_KEY="test-key")
+        procs = [
+            subprocess.Popen([sys.executable, "-c", probe], cwd=settings.BASE_DIR, env=env,
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            for _ in range(2)
+        ]
+        outputs = [p.communicate(timeout=60) for p in procs]
+
+        for p, (out, err) in zip(procs, outputs):
+            self.assertEqual(p.returncode, 0, err)
+            self.assertEqual(out.splitlines()[-2], '{"ok": true}')
+        self.assertEqual(self.server.requests, 1)
+        stats = [ast.literal_eval(out.splitlines()[-1]) for out, _ in outputs]
+        self.assertEqual(sorted((s["leaders"], s["shared"]) for s in stats), [(0, 1), (1, 0)])
+
+    def test_leader_error_reaches_every_caller_and_releases_the_lock(self):
+        from hirelens_app.services import single_flight
+
+        calls = []
+
+        def failing():
+            calls.append(1)
+            time.sleep(0.3)
+            raise RuntimeError("upstream failed")
+
+        results = self.concurrently(lambda: single_flight.do("sf-test", failing))
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+        self.assertFalse(single_flight._lock_path("sf-test").exists())
+
+        # The next call gets the lock at once instead of waiting LOCK_WAIT
+        started = time.monotonic()
+        self.assertEqual(single_flight.do("sf-test", lambda: "ok"), "ok")
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_async_callers_share_one_upstream_request(self):
+        from hirelens_app.services.llm_engine import aquery_llm
+
+        self.server.script = [("ok", 0.5)]
+
+        async def run():
+            return await asyncio.gather(*(
+                aquery_llm("coalesce me async", json_mode=True, cache=False) for _ in range(self.CALLERS)
+            ))
+
+        self.assertEqual(asyncio.run(run()), ['{"ok": true}'] * self.CALLERS)
+        self.assertEqual(self.server.requests, 1)
@@ -1,6 +1,13 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# Interview chat: native async views under ASGI, sync views under WSGI
+if settings.ASYNC_CHAT:
+    chat_view, chat_stream_view = views.api_chat_interaction_async, views.api_chat_stream_async
+else:
+    chat_view, chat_stream_view = views.api_chat_interaction, views.api_chat_stream
+
 urlpatterns = [
 
     # -------------------------------
@@ -19,6 +26,11 @@ urlpatterns = [
          views.view_candidates, 
          name="view_candidates"),
 
+    # Semantic top-K ranking of a job's candidates (JSON)
+    path("job/<int:job_id>/rank/", 
+         views.rank_job_candidates, 
+         name="rank_job_candidates"),
+
     # -------------------------------
     # RESUME UPLOAD & ANALYSIS PIPELINE
     # -------------------------------
@@ -26,16 +38,36 @@ urlpatterns = [
          views.upload_resume, 
          name="upload_resume"),
 
+    # Many PDFs (or a zip) for one job through the bulk ingestion pipeline
+    path("upload-resumes/bulk/", 
+         views.bulk_upload_resumes, 
+         name="bulk_upload_resumes"),
+
+    # Bulk ingestion task progress (JSON, polled by the bulk upload page)
+    path("upload-resumes/bulk/<int:task_id>/status/", 
+         views.bulk_upload_status, 
+         name="bulk_upload_status"),
+
     # Triggers the AI Analysis (Resume Parse + Question Generation)
     path("analyze/<int:candidate_id>/<int:job_id>/", 
          views.analyze_resume, 
          name="analyze_resume"),
 
+    # Scores one resume against every job of the HR in a single pass
+    path("match-all-jobs/<int:candidate_id>/", 
+         views.match_all_jobs, 
+         name="match_all_jobs"),
+
     # Shows the results (Similarity Score, AI Summary, Recommendations)
     path("analysis-result/<int:analysis_id>/", 
          views.analysis_result, 
          name="analysis_result"),
 
+    # Background pipeline progress (JSON, polled by the result page)
+    path("analysis-result/<int:analysis_id>/status/", 
+         views.analysis_status, 
+         name="analysis_status"),
+
     # -------------------------------
     # INTERVIEW FLOW (AI Powered)
     # -------------------------------
@@ -59,5 +91,7 @@ urlpatterns = [
 
      path('interview/start/<int:analysis_id>/', views.start_interview_session, name='start_interview_session'),
      path('interview/bot/<int:session_id>/', views.interview_bot, name='interview_bot'),
-     path('api/chat/', views.api_chat_interaction, name='api_chat_interaction'),
+     path('interview/end/<int:session_id>/', views.end_interview_session, name='end_interview_session'),
+     path('api/chat/', chat_view, name='api_chat_interaction'),
+     path('api/chat/stream/', chat_stream_view, name='api_chat_stream'),
 ]
\ No newline at end of file
@@ -1,6 +1,7 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse, JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.views.decorators.http import require_POST
 import json
 
@@ -16,9 +17,9 @@ from .models import (
 )
 
 # Import AI Services
-from .services.resume_parser import parse_resume_smart
-from .services.interview_engine import generate_ai_questions, evaluate_answer
-from .services.course_recommender import recommend_courses_smart
+from .services.interview_prewarm import claim_session, create_session, schedule_prewarm
+from .services.interview_engine import evaluate_answer
+from .services.job_matcher import skill_matches
 
 # =================================================
 # HR DASHBOARD
@@ -86,6 +87,18 @@ def view_candidates(request, job_id):
             analysis.skills_list = [skill.strip() for skill in analysis.extracted_skills_list.split(',')]
         else:
             analysis.skills_list = []
+
+    # Optional semantic ordering from the candidate vector index
+    sort = request.GET.get("sort", "")
+    candidate_list = list(analyses)
+    if sort == "semantic":
+        semantic_scores = _semantic_scores(job, top_k=len(candidate_list))
+        for analysis in candidate_list:
+            analysis.semantic_score = semantic_scores.get(analysis.candidate_id)
+        candidate_list.sort(
+            key=lambda a: a.semantic_score if a.semantic_score is not None else -1.0,
+            reverse=True
+        )
     
     # Calculate statistics
     total_applicants = analyses.count()
@@ -102,7 +115,8 @@ def view_candidates(request, job_id):
     
     context = {
         'job': job,
-        'analyses': analyses,
+        'analyses': candidate_list,
+        'sort': sort,
         'total_applicants': total_applicants,
         'avg_score': round(avg_score, 2),
         'high_match_count': high_match_count,
@@ -113,6 +127,42 @@ def view_candidates(request, job_id):
     
     return render(request, 'hirelens_app/view_candidates.html', context)
 
+def _semantic_scores(job, top_k):
+    """{candidate_id: score in %} from the vector index; empty if unavailable."""
+    from .services.candidate_index import rank_candidates
+    try:
+        return {cid: round(score * 100, 1) for cid, score in rank_candidates(job, top_k=top_k)}
+    except Exception as e:
+        print(f"Semantic Ranking Error: {e}")
+        return {}
+
+
+@login_required
+def rank_job_candidates(request, job_id):
+    """
+    JSON: top-K candidates for a job from the vector index.
+    ?k=<int> (default 20), ?scope=all to search every indexed candidate.
+    """
+    from .services.candidate_index import rank_candidates
+
+    job = get_object_or_404(CompanyRequirement, id=job_id, hr__user=request.user)
+    try:
+        top_k = max(1, min(int(request.GET.get("k", 20)), 1000))
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'k must be an integer'}, status=400)
+
+    ranked = rank_candidates(job, top_k=top_k, pool_only=request.GET.get("scope") != "all")
+    names = dict(Candidate.objects.filter(id__in=[cid for cid, _ in ranked]).values_list("id", "name"))
+
+    return JsonResponse({
+        'status': 'success',
+        'job_id': job.id,
+        'results': [
+            {'candidate_id': cid, 'name': names.get(cid, ""), 'score': round(score, 4)}
+            for cid, score in ranked
+        ]
+    })
+
 @login_required
 def hr_dashboard_with_error_handling(request):
     """
@@ -204,7 +254,11 @@ def upload_resume(request):
             resume=request.FILES.get("resume")
         )
 
-        # Redirect to Analysis Pipeline
+        # Redirect to Analysis Pipeline (all jobs: queued, shown as they land)
+        if job_id == "all":
+            from .services.task_queue import enqueue_once
+            enqueue_once("match_all_jobs", candidate_id=candidate.id, hr_id=hr.id)
+            return redirect("match_all_jobs", candidate.id)
         return redirect("analyze_resume", candidate.id, job_id)
 
     return render(request, "hirelens_app/upload_resume.html", {
@@ -217,68 +271,152 @@ def upload_resume(request):
 # =================================================
 @login_required
 def analyze_resume(request, candidate_id, job_id):
+    """
+    Queues the AI pipeline (parse, match, questions, courses) and returns
+    at once; `manage.py run_workers` does the work and the result page
+    polls analysis_status until it is done.
+    """
+    from django.db import transaction
+    from .services.task_queue import enqueue
+
     candidate = get_object_or_404(Candidate, id=candidate_id)
     job = get_object_or_404(CompanyRequirement, id=job_id)
 
-    # 1. AI Parse Resume
-    parsed_data = parse_resume_smart(candidate.resume.path)
-    extracted_skills = parsed_data.get("skills", [])
-    
-    # Clean list: remove empty strings and lower case
-    extracted_skills = [s.strip() for s in extracted_skills if s.strip()]
-    
-    ai_summary = parsed_data.get("summary", "Analysis pending...")
-    candidate_experience = parsed_data.get("experience_years", 0)
+    # Analysis row and its task are committed together
+    with transaction.atomic():
+        analysis = ResumeAnalysis.objects.create(
+            candidate=candidate,
+            job=job,
+            status=ResumeAnalysis.STATUS_QUEUED
+        )
+        enqueue("analyze_resume", analysis_id=analysis.id)
 
-    # 2. Strict Matching Logic
-    req_skills_list = [s.strip().lower() for s in job.required_skills.split(",") if s.strip()]
-    cand_skills_lower = [s.lower() for s in extracted_skills]
-    
-    matched_skills = set()
-    for req in req_skills_list:
-        # Strict Check: Requirement must explicitly exist or be a clear parent
-        # e.g. "react" matches "reactjs" or "react.js", but "java" does NOT match "javascript"
-        for cand in cand_skills_lower:
-            if req == cand: # Exact match
-                matched_skills.add(req)
-            elif req in cand and len(cand) < len(req) + 4: # Allow "react" -> "reactjs"
-                matched_skills.add(req)
-            elif f" {req} " in f" {cand} ": # Word boundary match "core java" -> "java"
-                matched_skills.add(req)
-
-    missing_skills = set(req_skills_list).difference(matched_skills)
-    
-    score = (len(matched_skills) / len(req_skills_list)) * 100 if req_skills_list else 0
-
-    # 3. Save Analysis Result
-    analysis = ResumeAnalysis.objects.create(
-        candidate=candidate,
-        job=job,
-        similarity_score=round(score, 1),
-        ai_summary=ai_summary,
-        extracted_skills_list=",".join(extracted_skills) 
-    )
+    return redirect("analysis_result", analysis.id)
 
-    # 4. Generate AI Questions & Courses (Keep existing logic)
-    questions = generate_ai_questions(extracted_skills, job.job_title, candidate_experience)
-    for q in questions:
-        GeneratedQuestion.objects.create(
-            analysis=analysis,
-            question_text=q.get("text", "Default Question"),
-            difficulty=q.get("difficulty", "Medium"),
-            topic=q.get("topic", "General")
-        )
 
-    recs = recommend_courses_smart(list(missing_skills))
-    for r in recs:
-        CourseRecommendation.objects.create(
-            analysis=analysis,
-            skill_name=r["skill"],
-            course_name=r["course"],
-            course_link=r["link"]
-        )
+@login_required
+def analysis_status(request, analysis_id):
+    """Polled by the result page while the background pipeline runs."""
+    analysis = get_object_or_404(ResumeAnalysis, id=analysis_id)
+    return JsonResponse({
+        "id": analysis.id,
+        "status": analysis.status,
+        "label": analysis.get_status_display(),
+        "done": analysis.status in (ResumeAnalysis.STATUS_DONE, ResumeAnalysis.STATUS_FAILED),
+        "similarity_score": analysis.similarity_score,
+    })
+# =================================================
+# MATCH ONE RESUME AGAINST ALL OF THE HR'S JOBS
+# =================================================
+@login_required
+def match_all_jobs(request, candidate_id):
+    """
+    POST queues the "match_all_jobs" task, which parses and embeds the
+    resume once and scores it against every job of the logged-in HR in one
+    pass (see services.job_matcher), and redirects here; GET only shows the
+    stored matches and reloads while that task is pending.
+    """
+    from .services.job_matcher import job_matches
+    from .services.task_queue import enqueue_once, is_pending
 
-    return redirect("analysis_result", analysis.id)
+    candidate = get_object_or_404(Candidate, id=candidate_id)
+    hr = get_object_or_404(HRProfile, user=request.user)
+    jobs = CompanyRequirement.objects.filter(hr=hr).order_by("-created_at")
+
+    if request.method == "POST":
+        enqueue_once("match_all_jobs", candidate_id=candidate.id, hr_id=hr.id)
+        return redirect("match_all_jobs", candidate.id)
+
+    results, unmatched = job_matches(candidate, jobs)
+
+    return render(request, "hirelens_app/job_matches.html", {
+        "candidate": candidate,
+        "results": [
+            {"analysis": analysis, "semantic_score": semantic}
+            for analysis, semantic in results
+        ],
+        "unmatched": unmatched,
+        "pending": is_pending("match_all_jobs", candidate_id=candidate.id, hr_id=hr.id),
+    })
+# =================================================
+# BULK RESUME UPLOAD (many PDFs or a zip, one job)
+# =================================================
+@login_required
+def bulk_upload_resumes(request):
+    """
+    Stages a batch of resumes for one job under MEDIA_ROOT and queues the
+    bulk pipeline (see services.bulk_ingest) for the run_workers
+    processes; the page then polls bulk_upload_status. Very large batches
+    are better run with `manage.py ingest_resumes`.
+    """
+    from .services.bulk_ingest import queue_uploads
+
+    hr = get_object_or_404(HRProfile, user=request.user)
+    jobs = CompanyRequirement.objects.filter(hr=hr)
+
+    if request.method == "POST":
+        job_id = request.POST.get("job", "")
+        job = jobs.filter(id=int(job_id)).first() if job_id.isdigit() else None
+        uploads = request.FILES.getlist("resumes")
+
+        if job is None or not uploads:
+            return render(request, "hirelens_app/bulk_upload.html", {
+                "jobs": jobs,
+                "error": "Please select a job requirement and at least one file."
+            })
+
+        try:
+            task = queue_uploads(uploads, job)
+        except Exception as e:
+            print(f"Bulk Upload Error: {e}")
+            return render(request, "hirelens_app/bulk_upload.html", {
+                "jobs": jobs,
+                "error": f"Could not process the upload: {e}"
+            })
+
+        return redirect(f"{reverse('bulk_upload_resumes')}?task={task.id}")
+
+    context = {"jobs": jobs}
+    task_id = request.GET.get("task")
+    if task_id and task_id.isdigit():
+        context.update(_bulk_ingest_state(hr, int(task_id)) or {})
+
+    return render(request, "hirelens_app/bulk_upload.html", context)
+
+
+def _bulk_ingest_state(hr, task_id):
+    """Status and progress of one of the HR's bulk ingestion tasks, or None."""
+    from .models import BackgroundTask
+    from .services.bulk_ingest import get_progress
+
+    task = BackgroundTask.objects.filter(id=task_id, kind="bulk_ingest").first()
+    if task is None:
+        return None
+    payload = json.loads(task.payload)
+    job = CompanyRequirement.objects.filter(id=payload.get("job_id"), hr=hr).first()
+    if job is None:
+        return None
+    return {
+        "task": task,
+        "job": job,
+        "stats": get_progress(payload.get("staging", "")),
+        "done": task.status in (BackgroundTask.STATUS_DONE, BackgroundTask.STATUS_FAILED),
+    }
+
+
+@login_required
+def bulk_upload_status(request, task_id):
+    """Polled by the bulk upload page while the ingestion task runs."""
+    hr = get_object_or_404(HRProfile, user=request.user)
+    state = _bulk_ingest_state(hr, task_id)
+    if state is None:
+        return JsonResponse({"error": "Not found"}, status=404)
+    return JsonResponse({
+        "status": state["task"].status,
+        "label": state["task"].get_status_display(),
+        "done": state["done"],
+        "stats": state["stats"],
+    })
 # =================================================
 # ANALYSIS RESULT VIEW
 # =================================================
@@ -303,16 +441,9 @@ def analysis_result(request, analysis_id):
     skills_data = []
     for req_skill in job_reqs:
         req_lower = req_skill.lower()
-        is_present = False
         
         # Apply SAME Strict Matching Logic here for display
-        for found in found_skills_clean:
-            if req_lower == found:
-                is_present = True; break
-            if req_lower in found and len(found) < len(req_lower) + 4:
-                is_present = True; break
-            if f" {req_lower} " in f" {found} ":
-                is_present = True; break
+        is_present = any(skill_matches(req_lower, found) for found in found_skills_clean)
         
         skills_data.append({
             "skill_name": req_skill,
@@ -321,9 +452,18 @@ def analysis_result(request, analysis_id):
             "similarity_score": 0.95 if is_present else 0.10 
         })
 
+    # Prefetch the interview session so "Start Interview" opens instantly
+    # (a no-op once the analysis has a pre-warmed, open or finished session)
+    if analysis.is_ready:
+        schedule_prewarm(analysis.id)
+
+    # Graded chat interviews (see interview_grading)
+    interview_results = InterviewResult.objects.filter(session__analysis=analysis).order_by("session_id", "id")
+
     return render(request, "hirelens_app/analysis_result.html", {
         "analysis": analysis,
         "courses": courses,
+        "interview_results": interview_results,
         "skills": skills_data,
         "summary": analysis.ai_summary
     })
@@ -383,8 +523,12 @@ def improvement_plan(request, analysis_id):
 # hirelens_app/views.py
 
 from django.http import JsonResponse
-from .models import InterviewSession, ChatMessage
-from .services.rag_service import build_rag_context, get_ai_response
+from .models import InterviewSession
+from .services.rag_service import (
+    CHAT_FALLBACK, aget_ai_response, astream_ai_response, get_ai_response, stream_ai_response,
+)
+from .services import session_state
+from .services.interview_grading import end_session
 import json
 
 # ... (Keep your existing Dashboard/Upload views) ...
@@ -394,28 +538,16 @@ import json
 # =================================================
 @login_required
 def start_interview_session(request, analysis_id):
-    analysis = get_object_or_404(ResumeAnalysis, id=analysis_id)
-    
-    # 1. Build the RAG Context (Internal Data)
-    # We load the full resume text again (or you can save it in the model)
-    from .services.resume_parser import extract_text_from_file
-    resume_text = extract_text_from_file(analysis.candidate.resume.path)
-    
-    system_context = build_rag_context(resume_text, analysis.job.required_skills)
-    
-    # 2. Create Session
-    session = InterviewSession.objects.create(
-        analysis=analysis,
-        system_context=system_context
-    )
-    
-    # 3. Generate Opening Message (The "Hello")
-    initial_greeting = get_ai_response(session.id, user_message="Start the interview now.")
-    
-    ChatMessage.objects.create(session=session, sender='ai', message_text=initial_greeting)
-    
+    # 1. Claim the session prepared in the background (a pure DB lookup)
+    session_id = claim_session(analysis_id)
+
+    # 2. None ready yet: build it now (context + opening message, blocks on the LLM)
+    if session_id is None:
+        analysis = get_object_or_404(ResumeAnalysis, id=analysis_id)
+        session_id = create_session(analysis).id
+
     # Redirect to the Chat Interface
-    return redirect('interview_bot', session_id=session.id)
+    return redirect('interview_bot', session_id=session_id)
 
 # =================================================
 # 2. RENDER CHAT INTERFACE
@@ -425,6 +557,15 @@ def interview_bot(request, session_id):
     session = get_object_or_404(InterviewSession, id=session_id)
     return render(request, "hirelens_app/interview_bot.html", {"session": session})
 
+@require_POST
+@login_required
+def end_interview_session(request, session_id):
+    session = get_object_or_404(InterviewSession, id=session_id)
+
+    # Whole transcript is graded in the background (batched, see interview_grading)
+    end_session(session.id)
+    return redirect('analysis_result', analysis_id=session.analysis_id)
+
 # =================================================
 # 3. API: SEND MESSAGE & GET AI RESPONSE
 # =================================================
@@ -435,18 +576,128 @@ def api_chat_interaction(request):
         session_id = data.get('session_id')
         user_text = data.get('message')
         
-        session = InterviewSession.objects.get(id=session_id)
+        # Session state is served from the hot-session cache (see session_state)
+        session = session_state.load(session_id)
         
         # 1. Save Candidate Message
-        ChatMessage.objects.create(session=session, sender='candidate', message_text=user_text)
+        session_state.append(session.id, 'candidate', user_text)
         
         # 2. Get AI Response (RAG)
-        ai_text = get_ai_response(session_id, user_text)
+        ai_text = get_ai_response(session.id, user_text)
         
         # 3. Save AI Message
-        ChatMessage.objects.create(session=session, sender='ai', message_text=ai_text)
+        session_state.append(session.id, 'ai', ai_text)
         
         return JsonResponse({'status': 'success', 'ai_response': ai_text})
         
     except Exception as e:
-        return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
\ No newline at end of file
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
+
+
+# =================================================
+# 4. API: SEND MESSAGE & STREAM AI RESPONSE (SSE)
+# =================================================
+def _sse(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+@require_POST
+def api_chat_stream(request):
+    """
+    Like api_chat_interaction, but relays the reply as Server-Sent Events
+    while the model generates it: `delta` events carry text, a final `done`
+    event the whole reply, which is saved as a ChatMessage at that point.
+    """
+    try:
+        data = json.loads(request.body)
+        session = session_state.load(data.get('session_id'))
+        user_text = data.get('message')
+    except Exception as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+
+    # 1. Save Candidate Message (it is then part of the history sent to the model)
+    session_state.append(session.id, 'candidate', user_text)
+
+    def events():
+        parts = []
+        try:
+            for delta in stream_ai_response(session.id):
+                parts.append(delta)
+                yield _sse("delta", {"text": delta})
+        except Exception as e:
+            print(f"OpenAI Stream Error: {e}")
+            if not parts:
+                parts = [CHAT_FALLBACK]
+                yield _sse("delta", {"text": CHAT_FALLBACK})
+
+        # 2. Save AI Message once the stream has completed
+        ai_text = "".join(parts)
+        session_state.append(session.id, 'ai', ai_text)
+        yield _sse("done", {"ai_response": ai_text})
+
+    response = StreamingHttpResponse(events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx: don't buffer the stream
+    return response
+
+
+# =================================================
+# 5. ASYNC CHAT API (ASGI)
+# =================================================
+# Same contract as the two endpoints above, but native async: the message
+# writes use Django's async ORM and the OpenAI call is awaited, so under
+# ASGI a candidate waiting on the model holds no thread. urls.py routes
+# these when settings.ASYNC_CHAT is on (set by hirelens/asgi.py).
+@require_POST
+async def api_chat_interaction_async(request):
+    try:
+        data = json.loads(request.body)
+        session = await session_state.aload(data.get('session_id'))
+        user_text = data.get('message')
+
+        # 1. Save Candidate Message
+        await session_state.aappend(session.id, 'candidate', user_text)
+
+        # 2. Get AI Response (RAG)
+        ai_text = await aget_ai_response(session.id, user_text)
+
+        # 3. Save AI Message
+        await session_state.aappend(session.id, 'ai', ai_text)
+
+        return JsonResponse({'status': 'success', 'ai_response': ai_text})
+
+    except Exception as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
+
+
+@require_POST
+async def api_chat_stream_async(request):
+    try:
+        data = json.loads(request.body)
+        session = await session_state.aload(data.get('session_id'))
+        user_text = data.get('message')
+    except Exception as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+
+    await session_state.aappend(session.id, 'candidate', user_text)
+
+    async def events():
+        parts = []
+        try:
+            async for delta in astream_ai_response(session.id):
+                parts.append(delta)
+                yield _sse("delta", {"text": delta})
+        except Exception as e:
+            print(f"OpenAI Stream Error: {e}")
+            if not parts:
+                parts = [CHAT_FALLBACK]
+                yield _sse("delta", {"text": CHAT_FALLBACK})
+
+        ai_text = "".join(parts)
+        await session_state.aappend(session.id, 'ai', ai_text)
+        yield _sse("done", {"ai_response": ai_text})
+
+    response = StreamingHttpResponse(events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response